@@ -2,19 +2,22 @@
 Auth router: email/password + Google OAuth2
 All endpoints return JWT tokens.
 """
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, status, Body
 from fastapi.responses import RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 import httpx
 from urllib.parse import urlencode
+from typing import Union
 
-from app.db.session import get_db
+from app.db.session import get_db, read_sessionmaker
 from app.models.user import User
-from app.schemas.user import UserCreate, UserLogin, UserRead, TokenResponse
+from app.schemas.user import BootstrapRead, UserCreate, UserLogin, UserRead, TokenResponse
+from app.services.task_queries import build_task_detail, fetch_sidebar_progress, fetch_task_rows
 from app.core.security import (
-    hash_password, verify_password, encrypt_data, decrypt_data,
-    create_access_token, get_current_user,
+    hash_password_async, verify_and_update_password, encrypt_data, decrypt_data,
+    create_access_token, get_current_user, invalidate_principal, UserSnapshot,
 )
 from app.core.config import settings
 
@@ -22,7 +25,7 @@ router = APIRouter()
 
 
 # ─── Helpers ──────────────────────────────────────────────────
-def _build_user_read(user: User) -> UserRead:
+def _build_user_read(user: Union[User, UserSnapshot]) -> UserRead:
     """Build a UserRead response, decrypting fields as needed."""
     return UserRead(
         id=user.id,
@@ -67,6 +70,7 @@ async def _get_or_create_social_user(
             user.provider_id = provider_id
             await db.commit()
             await db.refresh(user)
+            invalidate_principal(user.id)
         return user
 
     # Create new user
@@ -95,7 +99,7 @@ async def signup(user_in: UserCreate, db: AsyncSession = Depends(get_db)):
 
     user = User(
         email=user_in.email,
-        hashed_password=hash_password(user_in.password),
+        hashed_password=await hash_password_async(user_in.password),
         auth_provider="email",
         full_name=user_in.full_name,
         granularity_level=3,
@@ -115,18 +119,56 @@ async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
     if not user or not user.hashed_password:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
-    if not verify_password(credentials.password, user.hashed_password):
+    valid, new_hash = await verify_and_update_password(credentials.password, user.hashed_password)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
+    # Transparent rehash when the stored hash uses an outdated scheme/cost
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+
     return _build_token_response(user)
 
 
 @router.get("/me", response_model=UserRead)
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: UserSnapshot = Depends(get_current_user)):
     """Get the currently authenticated user."""
     return _build_user_read(current_user)
 
 
+@router.get("/me/bootstrap", response_model=BootstrapRead)
+async def get_bootstrap(
+    include_latest: bool = True,
+    current_user: UserSnapshot = Depends(get_current_user),
+):
+    """
+    Everything the dashboard needs on load in one request: the decrypted
+    profile with streak stats, the sidebar with per-task progress and
+    (unless include_latest=false) the newest task's steps.
+    The sidebar and latest-task queries run concurrently on their own sessions.
+    """
+    session_factory = read_sessionmaker(user_id=current_user.id)
+
+    async def load_sidebar():
+        async with session_factory() as db:
+            return await fetch_sidebar_progress(db, current_user.id)
+
+    async def load_latest():
+        if not include_latest:
+            return None
+        async with session_factory() as db:
+            rows = await fetch_task_rows(db, latest_for_user=current_user.id)
+        return await build_task_detail(rows) if rows else None
+
+    tasks, latest_task = await asyncio.gather(load_sidebar(), load_latest())
+    return {
+        "user": _build_user_read(current_user),
+        "tasks": tasks,
+        "latest_task": latest_task,
+    }
+
+
 # ─── Google OAuth2 (Implicit / Token Flow Support) ────────────
 GOOGLE_USERINFO_URL = "https://www.googleapis.com/oauth2/v2/userinfo"
 
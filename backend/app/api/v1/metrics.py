@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from app.core.metrics import metrics
+
+router = APIRouter()
+
+@router.get("/")
+async def get_metrics():
+    """
+    Returns this worker's counters, summaries (count/sum/avg/max) and gauges.
+    Each uvicorn worker keeps its own registry.
+    """
+    return metrics.snapshot()
@@ -1,18 +1,27 @@
-from fastapi import APIRouter,Depends, HTTPException, status    
+import base64
+import json
+from fastapi import APIRouter,Depends, Header, HTTPException, Query, Response, status    
 from fastapi.responses import StreamingResponse
 from app.schemas.task import TaskCreate
-from app.services.pii_services import scrub_pii
-from app.services.ai_service import stream_micro_wins
+from app.services.pii_services import scrub_pii_async
+from app.services.ai_service import replay_persisted, stream_micro_wins
+from app.services.stream_replay import stream_replay
+from app.services.admission import admission
+from app.core.metrics import metrics
+from app.services.task_queries import build_task_detail, fetch_task_rows, task_rows_version
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db, mark_task_write, mark_user_write
 from app.models.task import Task, MicroWinModel
 from app.models.user import User
-from app.core.security import encrypt_data, decrypt_data
-from sqlalchemy import select
+from app.core.security import encrypt_data, decrypt_rows, invalidate_principal
+from app.core.plaintext_cache import plaintext_cache
+from app.core.etag import REVALIDATE, etag_matches, make_etag
+from sqlalchemy import and_, case, func, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
-from app.schemas.task import TaskRead
-from typing import List
-from datetime import date
+from app.schemas.task import MicroWinBatchUpdate, TaskPage, TaskRead
+from typing import List, Optional
+from datetime import date, timedelta
 
 router = APIRouter()
 
@@ -21,126 +30,285 @@ async def health_check():
     """Simple health check for Docker HEALTHCHECK."""
     return {"status": "ok"}
 
+# ─── Decomposition Streams ────────────────────────────────────
+def _sse_response(events, task_id: int) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable nginx buffering for SSE
+            "X-Task-Id": str(task_id),
+        }
+    )
+
+def _event_id(raw: Optional[str]) -> int:
+    if not raw:
+        return 0
+    try:
+        return max(int(raw), 0)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+
+def _resume(task_id: int, after: int) -> StreamingResponse:
+    """Continue a task's stream after event `after`: live buffer first, else the DB."""
+    stream = stream_replay.get(task_id)
+    if stream is not None:
+        metrics.incr("stream_replay.resumed_live")
+        return _sse_response(stream_replay.subscribe(stream, after), task_id)
+    metrics.incr("stream_replay.resumed_persisted")
+    return _sse_response(stream_replay.replay(replay_persisted(task_id), after), task_id)
+
+async def _task_for_key(db: AsyncSession, user_id: int, idempotency_key: str) -> Optional[int]:
+    return (await db.execute(
+        select(Task.id).where(Task.user_id == user_id, Task.idempotency_key == idempotency_key)
+    )).scalar()
+
 @router.post("/decompose/stream")
 async def decompose_task_stream(
     task_in: TaskCreate, 
     user_id: int, # Ensure this is coming from the request
+    idempotency_key: Optional[str] = Header(default=None, max_length=200),
+    last_event_id: Optional[str] = Header(default=None),
     db: AsyncSession = Depends(get_db)
 ):
-    # 1. Clean the text
-    safe_text = scrub_pii(task_in.instruction)
-
-    # 2. Encrypt AND Decode to string
-    # This turns b'gAAAA...' into 'gAAAA...' so the DB doesn't crash
-    encrypted_goal_str = encrypt_data(safe_text).decode('utf-8')
-
-    # 3. Create Task with the correct user_id
-    new_task = Task(
-        encrypted_goal=encrypted_goal_str,
-        user_id=user_id,
-        is_completed=False
-    )
-    db.add(new_task)
-    await db.commit()
-    await db.refresh(new_task)
+    """
+    Creates a Task and streams its decomposition as SSE events with ids.
+    Send an Idempotency-Key to make retries safe: a retry with the same key
+    attaches to the task the first attempt created (resuming after its
+    Last-Event-ID) instead of creating another task and calling Gemini again.
+    New decompositions are admission-controlled: 429 when the user is over
+    their rate limit, 503 when the worker is saturated (both with Retry-After).
+    """
+    # 0. Retry of a request we have already seen?
+    if idempotency_key:
+        existing_id = await _task_for_key(db, user_id, idempotency_key)
+        if existing_id is not None:
+            await db.close()
+            metrics.incr("stream_replay.idempotent_retries")
+            return _resume(existing_id, _event_id(last_event_id))
 
-    return StreamingResponse(
-        stream_micro_wins(safe_text, new_task.id, user_id, db),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "X-Accel-Buffering": "no",  # Disable nginx buffering for SSE
-        }
+    # 1. Rate limit + generation slot; rejected before any task is created.
+    # Don't hold a pooled connection while waiting in the queue.
+    await db.close()
+    slot = await admission.admit(user_id)
+    try:
+        # 2. Clean the text (NER runs in the PII worker pool, off the event loop)
+        safe_text = await scrub_pii_async(task_in.instruction)
+
+        # 3. Encrypt AND Decode to string
+        # This turns b'gAAAA...' into 'gAAAA...' so the DB doesn't crash
+        encrypted_goal_str = encrypt_data(safe_text).decode('utf-8')
+
+        # 4. Create Task with the correct user_id
+        new_task = Task(
+            encrypted_goal=encrypted_goal_str,
+            user_id=user_id,
+            is_completed=False,
+            idempotency_key=idempotency_key,
+        )
+        db.add(new_task)
+        try:
+            await db.commit()
+        except IntegrityError:
+            # A concurrent retry with the same key won the insert; follow that one
+            await db.rollback()
+            existing_id = await _task_for_key(db, user_id, idempotency_key)
+            await db.close()
+            if existing_id is None:
+                raise
+            slot.release()
+            metrics.incr("stream_replay.idempotent_retries")
+            return _resume(existing_id, _event_id(last_event_id))
+    except BaseException:
+        slot.release()
+        raise
+
+    # 5. Generate in the background so a dropped client can reconnect to it.
+    # The id is populated on flush; no refresh, so no session is held while
+    # the stream is open - the stream opens its own short-lived sessions.
+    # The slot is held until the generation ends, not until the client leaves.
+    stream = stream_replay.start(
+        new_task.id,
+        admission.guard(slot, stream_micro_wins(safe_text, new_task.id, user_id)),
     )
+    mark_user_write(user_id)
+    mark_task_write(new_task.id)
+    await db.close()
+
+    return _sse_response(stream_replay.subscribe(stream), new_task.id)
+
+@router.get("/{task_id}/stream")
+async def resume_task_stream(
+    task_id: int,
+    last_event_id: Optional[str] = Header(default=None),
+    after: Optional[int] = Query(default=None, ge=0),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Reconnect to a decomposition stream. Events after Last-Event-ID (or
+    ?after=N) are replayed from this worker's buffer and followed live; when
+    the buffer is gone the persisted steps are sent instead. Never calls Gemini.
+    """
+    exists = (await db.execute(select(Task.id).where(Task.id == task_id))).scalar()
+    await db.close()
+    if exists is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return _resume(task_id, after if after is not None else _event_id(last_event_id))
+
+async def _decrypt_tasks(tasks) -> list:
+    """
+    Decrypts Tasks (with micro_wins loaded) into the TaskRead shape.
+    Every goal and action of the page goes through one decrypt_rows call.
+    """
+    rows = []
+    for task in tasks:
+        rows.append(("task", task.id, task.encrypted_goal))
+        rows.extend(("micro_win", mw.id, mw.encrypted_action) for mw in task.micro_wins)
+    plain = iter(await decrypt_rows(rows))
+
+    decrypted_tasks = []
+    for task in tasks:
+        plain_goal = next(plain)
+        decrypted_steps = []
+        for mw in task.micro_wins:
+            decrypted_steps.append({
+                "id": mw.id,
+                "step_order": mw.step_order,
+                "action": next(plain),
+                "is_completed": mw.is_completed
+            })
+
+        # If decryption fails (e.g., wrong key), we skip that specific task
+        if plain_goal is None or any(step["action"] is None for step in decrypted_steps):
+            print(f"Decryption failed for Task {task.id}")
+            continue
+
+        decrypted_tasks.append({
+            "id": task.id,
+            "goal": plain_goal,
+            "is_completed": task.is_completed,
+            "micro_wins": decrypted_steps
+        })
+    return decrypted_tasks
 
 @router.get("/", response_model=List[TaskRead])
-async def get_all_tasks(db: AsyncSession = Depends(get_db)):
+async def get_all_tasks(user_id: Optional[int] = None, db: AsyncSession = Depends(get_read_db)):
     """
     Fetches all tasks and their micro-wins, decrypting the data 
     before sending it to the frontend.
+    Pass user_id to scope the list to one owner; prefer /page for large lists.
     """
     # 1. Fetch tasks with their related micro_wins (ordered by newest first)
-    result = await db.execute(
-        select(Task)
-        .options(selectinload(Task.micro_wins))
-        .order_by(Task.id.desc())
-    )
+    query = select(Task).options(selectinload(Task.micro_wins)).order_by(Task.id.desc())
+    if user_id is not None:
+        query = query.where(Task.user_id == user_id)
+    result = await db.execute(query)
     tasks = result.scalars().all()
 
-    decrypted_tasks = []
-
     # 2. Decrypt the data for the response
-    for task in tasks:
-        try:
-            # Decrypt the parent goal
-            plain_goal = decrypt_data(task.encrypted_goal)
-            
-            # Decrypt each individual step
-            decrypted_steps = []
-            for mw in task.micro_wins:
-                decrypted_steps.append({
-                    "id": mw.id,
-                    "step_order": mw.step_order,
-                    "action": decrypt_data(mw.encrypted_action),
-                    "is_completed": mw.is_completed
-                })
-
-            decrypted_tasks.append({
-                "id": task.id,
-                "goal": plain_goal,
-                "is_completed": task.is_completed,
-                "micro_wins": decrypted_steps
-            })
-        except Exception as e:
-            # If decryption fails (e.g., wrong key), we skip that specific task
-            print(f"Decryption failed for Task {task.id}: {e}")
-            continue
+    return await _decrypt_tasks(tasks)
 
-    return decrypted_tasks
+# ─── Keyset Pagination ────────────────────────────────────────
+def _encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded))["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@router.get("/page", response_model=TaskPage)
+async def get_tasks_page(
+    user_id: Optional[int] = None,
+    is_completed: Optional[bool] = None,
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Paginated variant of GET /: newest first, keyset on (id DESC).
+    Each page is an index range scan of at most `limit` rows, so latency
+    stays flat no matter how deep the client pages. Pass the returned
+    next_cursor back to get the following page; it is null on the last page.
+    """
+    query = select(Task).options(selectinload(Task.micro_wins)).order_by(Task.id.desc())
+    if user_id is not None:
+        query = query.where(Task.user_id == user_id)
+    if is_completed is not None:
+        query = query.where(Task.is_completed == is_completed)
+    if cursor:
+        query = query.where(Task.id < _decode_cursor(cursor))
+
+    # Fetch one extra row to know whether another page exists
+    result = await db.execute(query.limit(limit + 1))
+    tasks = result.scalars().all()
+    has_more = len(tasks) > limit
+    tasks = tasks[:limit]
+
+    return {
+        "items": await _decrypt_tasks(tasks),
+        "next_cursor": _encode_cursor(tasks[-1].id) if has_more else None,
+    }
 
 @router.get("/user/{user_id}")
-async def get_user_sidebar_tasks(user_id: int, db: AsyncSession = Depends(get_db)):
+async def get_user_sidebar_tasks(
+    user_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_read_db),
+):
     """
     Returns only the titles of tasks belonging to a specific user.
     Use this to populate the sidebar.
+    Sends a strong ETag; a matching If-None-Match gets an empty 304.
     """
     result = await db.execute(
         select(Task.id, Task.title).where(Task.user_id == user_id).order_by(Task.id.desc())
     )
     tasks = result.all()
+
+    etag = make_etag("sidebar", user_id, [(t.id, t.title) for t in tasks])
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": REVALIDATE})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE
+
     # Format: [{"id": 1, "title": "House of Cards"}, ...]
     return [{"id": t.id, "title": t.title or "Untitled Task"} for t in tasks]
 
 @router.get("/{task_id}")
-async def get_task_details(task_id: int, db: AsyncSession = Depends(get_db)):
+async def get_task_details(
+    task_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_read_db),
+):
     """
     Returns the goal and all associated Micro-Wins (decrypted).
     Use this when a user clicks a sidebar item.
+
+    Task and steps come back in one joined query. The ETag covers everything
+    that can change (title, completion flags, the step list), so a client
+    re-opening an unchanged task gets a 304 before anything is decrypted.
     """
-    # 1. Fetch Task
-    task = await db.get(Task, task_id)
-    if not task:
+    rows = await fetch_task_rows(db, task_id)
+    if not rows:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    # 2. Fetch associated Micro-Wins
-    result = await db.execute(
-        select(MicroWinModel).where(MicroWinModel.task_id == task_id).order_by(MicroWinModel.step_order)
-    )
-    steps = result.scalars().all()
+    etag = make_etag("task", *task_rows_version(rows))
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": REVALIDATE})
 
-    return {
-        "id": task.id,
-        "title": task.title,
-        "goal": decrypt_data(task.encrypted_goal.encode('utf-8')),
-        "steps": [
-            {
-                "id": s.id,
-                "action": decrypt_data(s.encrypted_action), # Decrypt for UI
-                "is_completed": s.is_completed,
-                "order": s.step_order
-            } for s in steps
-        ]
-    }
+    detail = await build_task_detail(rows)
+    if detail is None:
+        raise HTTPException(status_code=500, detail="Could not decrypt task")
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE
+    return detail
 
 
 @router.delete("/{task_id}", status_code=204)
@@ -149,73 +317,205 @@ async def delete_task(task_id: int, db: AsyncSession = Depends(get_db)):
     task = await db.get(Task, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
+    step_ids = (await db.execute(
+        select(MicroWinModel.id).where(MicroWinModel.task_id == task_id)
+    )).scalars().all()
     await db.delete(task)
     await db.commit()
+    mark_task_write(task_id)
+    mark_user_write(task.user_id)
+
+    # Drop the deleted plaintext from memory right away
+    plaintext_cache.invalidate("task", task_id)
+    for step_id in step_ids:
+        plaintext_cache.invalidate("micro_win", step_id)
     return None
 
+async def _record_quest_completions(db: AsyncSession, user_id: int, quests: int = 1):
+    """
+    Credit finished quests to a user's streak and total in one UPDATE.
+
+    The whole read-modify-write happens inside the statement, so concurrent
+    completions for the same user serialize on the row lock instead of
+    overwriting each other. Streak rules: same day keeps it, the day after
+    extends it, anything else (or no previous completion) restarts it at 1.
+    Returns (streak_count, total_completed), or (0, 0) if the user is gone.
+    """
+    today = date.today()
+    streak = case(
+        (User.last_completion_date == today, func.coalesce(User.streak_count, 0)),
+        (User.last_completion_date == today - timedelta(days=1), func.coalesce(User.streak_count, 0) + 1),
+        else_=1,
+    )
+    row = (await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(
+            total_completed=func.coalesce(User.total_completed, 0) + quests,
+            streak_count=streak,
+            last_completion_date=today,
+        )
+        .returning(User.streak_count, User.total_completed)
+    )).first()
+    return (row.streak_count, row.total_completed) if row else (0, 0)
+
 @router.patch("/microwins/{step_id}", status_code=200)
 async def update_microwin_status(step_id: int, is_completed: bool, db: AsyncSession = Depends(get_db)):
     """
     Update the completion status of a specific micro-win step.
     Also updates the parent Task's is_completed status if all steps are finished.
     Includes streak/gamification logic.
+
+    Completion is tracked by the Task's total_steps / completed_steps counters,
+    so this is two UPDATE ... RETURNING statements no matter how many steps the
+    task has. The step update only matches when the status actually changes,
+    which keeps repeated or concurrent toggles from double-counting.
     """
-    # 1. Fetch the step
-    step = await db.get(MicroWinModel, step_id)
-    if not step:
-        raise HTTPException(status_code=404, detail="Micro-win step not found")
+    # 1. Flip the step (no-op if it is already in the requested state)
+    changed = (await db.execute(
+        update(MicroWinModel)
+        .where(MicroWinModel.id == step_id, MicroWinModel.is_completed.is_distinct_from(is_completed))
+        .values(is_completed=is_completed)
+        .returning(MicroWinModel.task_id)
+    )).first()
+
+    if changed is None:
+        # Nothing changed (retry, second tab, lost race): report the current
+        # state, including the user's real streak/total for the UI
+        current = (await db.execute(
+            select(MicroWinModel.id, Task.is_completed, User.streak_count, User.total_completed)
+            .outerjoin(Task, Task.id == MicroWinModel.task_id)
+            .outerjoin(User, User.id == Task.user_id)
+            .where(MicroWinModel.id == step_id)
+        )).first()
+        if current is None:
+            raise HTTPException(status_code=404, detail="Micro-win step not found")
+        return {
+            "id": step_id,
+            "is_completed": is_completed,
+            "task_completed": bool(current.is_completed),
+            "streak_count": current.streak_count or 0,
+            "total_completed": current.total_completed or 0,
+        }
+
+    # 2. Move the parent Task's counter atomically; the task is complete when
+    #    every step is (SET expressions see the pre-update row)
+    delta = 1 if is_completed else -1
+    parent_task = (await db.execute(
+        update(Task)
+        .where(Task.id == changed.task_id)
+        .values(
+            completed_steps=Task.completed_steps + delta,
+            is_completed=and_(Task.total_steps > 0, Task.completed_steps + delta >= Task.total_steps),
+        )
+        .returning(Task.user_id, Task.is_completed, Task.completed_steps, Task.total_steps)
+    )).first()
+    # Only the toggle that completes the last step counts as finishing the quest
+    all_done = bool(
+        is_completed and parent_task
+        and parent_task.is_completed
+        and parent_task.completed_steps == parent_task.total_steps
+    )
+
+    # 3. Gamification: Update streak when a full quest is completed
+    streak_count = 0
+    total_completed = 0
+    if all_done and parent_task.user_id:
+        streak_count, total_completed = await _record_quest_completions(db, parent_task.user_id)
+
+    await db.commit()
+    mark_task_write(changed.task_id)
+    if parent_task and parent_task.user_id:
+        mark_user_write(parent_task.user_id)
+        invalidate_principal(parent_task.user_id)
     
-    # 2. Update status
-    step.is_completed = is_completed
+    return {
+        "id": step_id,
+        "is_completed": is_completed,
+        "task_completed": parent_task.is_completed if parent_task else False,
+        "streak_count": streak_count,
+        "total_completed": total_completed,
+    }
 
-    # 3. Check if ALL steps for this task are now completed
-    result = await db.execute(
-        select(MicroWinModel).where(MicroWinModel.task_id == step.task_id)
+@router.patch("/microwins", status_code=200)
+async def update_microwin_statuses(batch: MicroWinBatchUpdate, db: AsyncSession = Depends(get_db)):
+    """
+    Bulk version of PATCH /microwins/{step_id} for "mark all done" style actions.
+    All steps flip in one UPDATE, every affected task's counters move in a
+    second one, and streaks are credited once per user - one transaction.
+    If a step id appears twice, the last entry wins.
+    """
+    wanted = {u.step_id: u.is_completed for u in batch.updates}
+
+    found = set((await db.execute(
+        select(MicroWinModel.id).where(MicroWinModel.id.in_(wanted))
+    )).scalars())
+    missing = sorted(set(wanted) - found)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Micro-win steps not found: {missing}")
+
+    # 1. Flip every step whose status actually changes
+    target = case(
+        (MicroWinModel.id.in_([i for i, done in wanted.items() if done]), True),
+        else_=False,
     )
-    all_steps = result.scalars().all()
+    changed = (await db.execute(
+        update(MicroWinModel)
+        .where(MicroWinModel.id.in_(wanted), MicroWinModel.is_completed.is_distinct_from(target))
+        .values(is_completed=target)
+        .returning(MicroWinModel.id, MicroWinModel.task_id, MicroWinModel.is_completed)
+        .execution_options(synchronize_session=False)
+    )).all()
 
-    all_done = all(s.is_completed for s in all_steps)
+    deltas = {}
+    for row in changed:
+        deltas[row.task_id] = deltas.get(row.task_id, 0) + (1 if row.is_completed else -1)
+    deltas = {task_id: d for task_id, d in deltas.items() if d}
 
-    # 4. Update Parent Task
-    parent_task = await db.get(Task, step.task_id)
-    if parent_task:
-        parent_task.is_completed = all_done
+    # 2. Move the counters of every affected task at once
+    tasks = []
+    if deltas:
+        delta = case(deltas, value=Task.id, else_=0)
+        tasks = (await db.execute(
+            update(Task)
+            .where(Task.id.in_(deltas))
+            .values(
+                completed_steps=Task.completed_steps + delta,
+                is_completed=and_(Task.total_steps > 0, Task.completed_steps + delta >= Task.total_steps),
+            )
+            .returning(Task.id, Task.user_id, Task.is_completed, Task.completed_steps, Task.total_steps)
+            .execution_options(synchronize_session=False)
+        )).all()
+
+    # 3. Gamification, once per user, for the quests this batch finished
+    finished = {}
+    for t in tasks:
+        if t.user_id and deltas[t.id] > 0 and t.is_completed and t.completed_steps == t.total_steps:
+            finished[t.user_id] = finished.get(t.user_id, 0) + 1
 
-    # 5. Gamification: Update streak when a full quest is completed
     streak_count = 0
     total_completed = 0
-    if all_done and parent_task and parent_task.user_id:
-        user = await db.get(User, parent_task.user_id)
-        if user:
-            today = date.today()
-            user.total_completed = (user.total_completed or 0) + 1
-            total_completed = user.total_completed
-
-            # Streak logic: consecutive days
-            if user.last_completion_date:
-                days_diff = (today - user.last_completion_date).days
-                if days_diff == 0:
-                    # Same day — keep streak
-                    pass
-                elif days_diff == 1:
-                    # Consecutive day — increment streak
-                    user.streak_count = (user.streak_count or 0) + 1
-                else:
-                    # Streak broken — reset to 1
-                    user.streak_count = 1
-            else:
-                # First ever completion
-                user.streak_count = 1
-            
-            user.last_completion_date = today
-            streak_count = user.streak_count
+    for user_id, quests in finished.items():
+        streak_count, total_completed = await _record_quest_completions(db, user_id, quests)
 
     await db.commit()
-    
+    for t in tasks:
+        mark_task_write(t.id)
+    for user_id in {t.user_id for t in tasks if t.user_id}:
+        mark_user_write(user_id)
+        invalidate_principal(user_id)
+
     return {
-        "id": step.id, 
-        "is_completed": step.is_completed,
-        "task_completed": parent_task.is_completed if parent_task else False,
+        "updated": sorted(row.id for row in changed),
+        "tasks": [
+            {
+                "id": t.id,
+                "is_completed": t.is_completed,
+                "completed_steps": t.completed_steps,
+                "total_steps": t.total_steps,
+            } for t in tasks
+        ],
+        "tasks_completed": sum(finished.values()),
         "streak_count": streak_count,
         "total_completed": total_completed,
-    }
\ No newline at end of file
+    }
@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db, mark_user_write
 from app.models.user import User
 from app.schemas.user import UserCreate, UserProfileUpdate, UserRead
-from app.core.security import encrypt_data, decrypt_data, hash_password, verify_password
+from app.core.security import (
+    encrypt_data, decrypt_data, hash_password_async, verify_and_update_password,
+    invalidate_principal,
+)
 
 router = APIRouter()
 
@@ -23,7 +26,7 @@ async def signup(user_in: UserCreate, db: AsyncSession = Depends(get_db)):
     # Use hash_password for the 'hashed_password' column
     new_user = User(
         email=user_in.email,
-        hashed_password=hash_password(user_in.password),
+        hashed_password=await hash_password_async(user_in.password),
         granularity_level=3 # Default middle-ground
     )
     
@@ -39,18 +42,22 @@ async def login(user_credentials: UserCreate, db: AsyncSession = Depends(get_db)
     result = await db.execute(select(User).where(User.email == user_credentials.email))
     user = result.scalar_one_or_none()
 
-    if not user:
+    if not user or not user.hashed_password:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
 
     # 2. Verify Password (using the logic from app/core/security.py)
-    if not verify_password(user_credentials.password, user.hashed_password):
+    valid, new_hash = await verify_and_update_password(user_credentials.password, user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
 
     return {
             "id": user.id,
@@ -86,11 +93,14 @@ async def update_neuro_profile(
 
     await db.commit()
     await db.refresh(user)
+    # Cached principals hold a snapshot of this row
+    invalidate_principal(user.id)
+    mark_user_write(user.id)
     return user
 
 # --- 3. FETCH USER DATA (Loading Dashboard) ---
 @router.get("/{user_id}", response_model=UserRead)
-async def get_user_dashboard_data(user_id: int, db: AsyncSession = Depends(get_db)):
+async def get_user_dashboard_data(user_id: int, db: AsyncSession = Depends(get_read_db)):
     user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
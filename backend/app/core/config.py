@@ -1,4 +1,5 @@
 import os
+from typing import List
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -9,15 +10,85 @@ class Settings(BaseSettings):
     DATABASE_URL: str
     DB_ENCRYPTION_KEY: str
 
+    # Database connection pool, per worker process (see app/db/session.py).
+    # Keep workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) under Postgres max_connections.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0          # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800            # seconds; -1 keeps connections forever
+    DB_POOL_PRE_PING: bool = True          # one extra round trip per checkout
+    DB_STATEMENT_CACHE_SIZE: int = 100     # asyncpg prepared statements; 0 behind PgBouncer
+
+    # Optional read replica for read-only endpoints (empty = use the primary).
+    # After a write, reads for the same user/task stay on the primary this long.
+    DATABASE_READ_URL: str = ""
+    READ_YOUR_WRITES_SECONDS: float = 5.0
+
     # JWT
     JWT_SECRET_KEY: str = "microwin-super-secret-key-change-in-production-2024"
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION_MINUTES: int = 1440  # 24 hours
 
+    # Password hashing (bcrypt_sha256)
+    PASSWORD_HASH_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 0        # 0 = one thread per CPU core
+    PASSWORD_HASH_QUEUE_LIMIT: int = 64   # waiting jobs beyond this get a 503
+
+    # Verified-token cache for get_current_user (0 disables it)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+
     # OAuth2 — Google
     GOOGLE_CLIENT_ID: str = ""
 
 
+    # Bulk decryption for listing endpoints (see app/core/security.py)
+    DECRYPT_WORKERS: int = 0          # 0 = one thread per CPU core
+    DECRYPT_CHUNK_SIZE: int = 256
+    DECRYPT_INLINE_MAX: int = 32
+
+    # Decrypted goal/action cache (see app/core/plaintext_cache.py).
+    # Set PLAINTEXT_CACHE_ENABLED=false for strict-privacy deployments.
+    PLAINTEXT_CACHE_ENABLED: bool = True
+    PLAINTEXT_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    PLAINTEXT_CACHE_TTL_SECONDS: int = 600
+
+    # Decomposition stream write-behind (see app/services/step_buffer.py)
+    STREAM_FLUSH_MAX_STEPS: int = 8
+    STREAM_FLUSH_MAX_DELAY_MS: int = 1500
+
+    # Resumable streams (see app/services/stream_replay.py)
+    STREAM_REPLAY_MAX_TASKS: int = 1000
+    STREAM_REPLAY_RETAIN_SECONDS: int = 300   # keep finished streams for reconnects
+    STREAM_HEARTBEAT_SECONDS: float = 15.0
+    STREAM_RETRY_MS: int = 3000               # SSE reconnect delay hint
+
+    # PII scrubbing (see app/services/pii_services.py)
+    PII_SPACY_MODEL: str = "en_core_web_sm"
+    PII_SPACY_EXCLUDE: List[str] = ["tok2vec", "tagger", "parser", "senter", "attribute_ruler", "lemmatizer"]
+    PII_WARM_UP: bool = True      # boot workers + load the model in lifespan
+    # spaCy processes per uvicorn worker, each holding its own model copy:
+    # total = PII_WORKERS x --workers, so keep that at or below the CPU count.
+    # 0 = one per CPU core (only sensible with a single uvicorn worker).
+    PII_WORKERS: int = 1
+    PII_MAX_BATCH: int = 16
+    PII_BATCH_WAIT_MS: int = 5
+    PII_QUEUE_SIZE: int = 256
+
+    # Decomposition result cache (see app/services/decomposition_cache.py)
+    DECOMPOSITION_CACHE_ENABLED: bool = True
+    DECOMPOSITION_CACHE_MAX_ENTRIES: int = 2048
+    DECOMPOSITION_CACHE_TTL_SECONDS: int = 6 * 3600
+    DECOMPOSITION_CACHE_REDIS_URL: str = ""   # shared backend, entries Fernet-encrypted; needs `pip install redis`
+
+    # Decomposition admission control (see app/services/admission.py)
+    LLM_MAX_CONCURRENT: int = 16              # generations in flight per worker
+    LLM_QUEUE_SIZE: int = 64                  # waiters beyond that get 503 at once
+    LLM_QUEUE_TIMEOUT_SECONDS: float = 10.0   # longest wait for a slot
+    LLM_USER_RATE_PER_MINUTE: float = 20.0    # per-user token bucket refill
+    LLM_USER_BURST: int = 10                  # per-user bucket capacity
+    LLM_USER_BUCKETS_MAX: int = 10000
+
     # Frontend
     FRONTEND_URL: str = "http://localhost:5173"
 
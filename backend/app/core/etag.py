@@ -0,0 +1,24 @@
+# Strong ETags for JSON read endpoints (and conditional GET handling).
+import hashlib
+import json
+from typing import Optional
+
+# Clients must revalidate every time, but can reuse the body on a 304
+REVALIDATE = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag over JSON-serializable version data (ids, flags, titles...)."""
+    raw = json.dumps(parts, separators=(",", ":"), default=str).encode("utf-8")
+    return '"' + hashlib.blake2b(raw, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (RFC 9110: weak comparison, "*" matches anything)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
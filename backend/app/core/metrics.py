@@ -0,0 +1,78 @@
+# In-process metrics registry (counters, summaries and gauges).
+# Values are per worker process; they are exposed at GET /api/v1/metrics.
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+
+class _Summary:
+    """Running count / sum / max of an observed value (e.g. a latency)."""
+
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.total, 3),
+            "avg": round(self.total / self.count, 3) if self.count else 0.0,
+            "max": round(self.max, 3),
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(int)
+        self._summaries: Dict[str, _Summary] = defaultdict(_Summary)
+        self._gauges: Dict[str, Callable[[], float]] = {}
+
+    def incr(self, name: str, value: float = 1):
+        """Increase a monotonically growing counter."""
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, value: float):
+        """Record one observation (count/sum/avg/max are reported)."""
+        with self._lock:
+            self._summaries[name].observe(value)
+
+    def gauge(self, name: str, fn: Callable[[], float]):
+        """Register a gauge whose value is read lazily at snapshot time."""
+        self._gauges[name] = fn
+
+    @contextmanager
+    def timer(self, name: str):
+        """Observe the wall time of the wrapped block in milliseconds."""
+        t_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - t_start) * 1000)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            summaries = {k: v.as_dict() for k, v in self._summaries.items()}
+        gauges = {}
+        for name, fn in list(self._gauges.items()):
+            try:
+                gauges[name] = fn()
+            except Exception:
+                gauges[name] = None
+        return {"counters": counters, "summaries": summaries, "gauges": gauges}
+
+
+metrics = MetricsRegistry()
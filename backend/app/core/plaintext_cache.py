@@ -0,0 +1,85 @@
+# Bounded in-process cache of decrypted goals / actions.
+# Encrypted columns never change after creation, so the same ciphertext keeps
+# getting decrypted on every sidebar click. Entries are keyed by (kind, row id)
+# and carry a digest of the ciphertext they came from: a row whose ciphertext
+# differs from the cached one is simply a miss.
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple, Union
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+# Approximate per-entry bookkeeping cost (key tuple, digest, OrderedDict node)
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+def _digest(token: Union[str, bytes]) -> bytes:
+    if isinstance(token, str):
+        token = token.encode("utf-8")
+    return hashlib.blake2b(token, digest_size=16).digest()
+
+
+class PlaintextCache:
+    def __init__(
+        self,
+        enabled: bool = settings.PLAINTEXT_CACHE_ENABLED,
+        max_bytes: int = settings.PLAINTEXT_CACHE_MAX_BYTES,
+        ttl_seconds: int = settings.PLAINTEXT_CACHE_TTL_SECONDS,
+    ):
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.bytes_used = 0
+        # (kind, row_id) -> (digest, plaintext, expires_at, size)
+        self._entries: "OrderedDict[Tuple[str, int], tuple]" = OrderedDict()
+        metrics.gauge("plaintext_cache.bytes", lambda: self.bytes_used)
+        metrics.gauge("plaintext_cache.entries", lambda: len(self._entries))
+
+    def get(self, kind: str, row_id: int, token: Union[str, bytes]) -> Optional[str]:
+        if not self.enabled:
+            return None
+        key = (kind, row_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            metrics.incr("plaintext_cache.misses")
+            return None
+        digest, plain, expires_at, _ = entry
+        if expires_at < time.monotonic() or digest != _digest(token):
+            self._drop(key)
+            metrics.incr("plaintext_cache.misses")
+            return None
+        self._entries.move_to_end(key)
+        metrics.incr("plaintext_cache.hits")
+        return plain
+
+    def put(self, kind: str, row_id: int, token: Union[str, bytes], plain: str):
+        if not self.enabled:
+            return
+        key = (kind, row_id)
+        size = len(plain.encode("utf-8")) + _ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        self._drop(key)
+        self._entries[key] = (_digest(token), plain, time.monotonic() + self.ttl_seconds, size)
+        self.bytes_used += size
+        while self.bytes_used > self.max_bytes:
+            _, (_, _, _, evicted_size) = self._entries.popitem(last=False)
+            self.bytes_used -= evicted_size
+            metrics.incr("plaintext_cache.evictions")
+
+    def invalidate(self, kind: str, row_id: int):
+        self._drop((kind, row_id))
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes_used = 0
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes_used -= entry[3]
+
+
+plaintext_cache = PlaintextCache()
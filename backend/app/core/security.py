@@ -1,8 +1,15 @@
 # data encryption, decryption, JWT, and auth utilities
-from datetime import datetime, timedelta, timezone
-from typing import Optional
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Union
 
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, InvalidToken
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
@@ -11,6 +18,8 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.plaintext_cache import plaintext_cache
 from app.db.session import get_db
 
 # ─── Encryption ───────────────────────────────────────────────
@@ -25,8 +34,68 @@ def decrypt_data(token: bytes) -> str:
     return cipher_suite.decrypt(token).decode()
 
 
+# ─── Bulk Decryption ─────────────────────────────────────────
+# Listing endpoints decrypt hundreds of tokens per request. Doing that serially
+# on the event loop blocks every other request, so batches are split into
+# chunks and decrypted on a dedicated thread pool.
+_decrypt_pool = ThreadPoolExecutor(
+    max_workers=settings.DECRYPT_WORKERS or os.cpu_count(),
+    thread_name_prefix="decrypt",
+)
+
+def decrypt_many(tokens: Sequence[Union[str, bytes]]) -> List[Optional[str]]:
+    """Decrypts a chunk of tokens; a token that fails to decrypt yields None."""
+    plain = []
+    for token in tokens:
+        try:
+            plain.append(cipher_suite.decrypt(token).decode())
+        except InvalidToken:
+            plain.append(None)
+    return plain
+
+async def decrypt_batch(tokens: Sequence[Union[str, bytes]]) -> List[Optional[str]]:
+    """
+    Off-loop bulk equivalent of decrypt_data, order-preserving.
+    Small batches (<= DECRYPT_INLINE_MAX) are decrypted inline, where the
+    executor hand-off would cost more than the work itself.
+    """
+    if len(tokens) <= settings.DECRYPT_INLINE_MAX:
+        return decrypt_many(tokens)
+
+    loop = asyncio.get_running_loop()
+    size = settings.DECRYPT_CHUNK_SIZE
+    chunks = await asyncio.gather(*[
+        loop.run_in_executor(_decrypt_pool, decrypt_many, tokens[i:i + size])
+        for i in range(0, len(tokens), size)
+    ])
+    return [plain for chunk in chunks for plain in chunk]
+
+async def decrypt_rows(rows: Sequence[Tuple[str, int, Union[str, bytes]]]) -> List[Optional[str]]:
+    """
+    decrypt_batch for (kind, row_id, token) triples, served from the bounded
+    plaintext cache where possible; only misses are actually decrypted.
+    """
+    plain = [plaintext_cache.get(kind, row_id, token) for kind, row_id, token in rows]
+    misses = [i for i, value in enumerate(plain) if value is None]
+    if misses:
+        decrypted = await decrypt_batch([rows[i][2] for i in misses])
+        for i, value in zip(misses, decrypted):
+            plain[i] = value
+            if value is not None:
+                kind, row_id, token = rows[i]
+                plaintext_cache.put(kind, row_id, token, value)
+    return plain
+
+
 # ─── Password Hashing ────────────────────────────────────────
-pwd_context = CryptContext(schemes=["bcrypt_sha256"], deprecated="auto")
+# min_rounds = configured cost, so hashes made with an older, lower cost are
+# flagged by verify_and_update() and transparently re-hashed on login.
+pwd_context = CryptContext(
+    schemes=["bcrypt_sha256"],
+    deprecated="auto",
+    bcrypt_sha256__default_rounds=settings.PASSWORD_HASH_ROUNDS,
+    bcrypt_sha256__min_rounds=settings.PASSWORD_HASH_ROUNDS,
+)
 
 def hash_password(password: str) -> str:
     """Securely hashes a password."""
@@ -37,6 +106,49 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+# Async variants for request handlers. bcrypt costs hundreds of ms of CPU and
+# releases the GIL, so it runs on a dedicated pool sized to the cores. Jobs
+# beyond the pool plus PASSWORD_HASH_QUEUE_LIMIT are rejected with a 503
+# instead of queueing without bound behind a login burst.
+_hash_workers = settings.PASSWORD_HASH_WORKERS or os.cpu_count()
+_hash_pool = ThreadPoolExecutor(max_workers=_hash_workers, thread_name_prefix="pwhash")
+_hash_limit = _hash_workers + settings.PASSWORD_HASH_QUEUE_LIMIT
+_hash_pending = 0
+metrics.gauge("password_hash.pending", lambda: _hash_pending)
+
+async def _run_hash_job(name: str, fn, *args):
+    global _hash_pending
+    if _hash_pending >= _hash_limit:
+        metrics.incr("password_hash.rejected")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-ins right now, please retry in a moment.",
+            headers={"Retry-After": "1"},
+        )
+    _hash_pending += 1
+    try:
+        with metrics.timer(f"password_hash.{name}_ms"):
+            return await asyncio.get_running_loop().run_in_executor(_hash_pool, fn, *args)
+    finally:
+        _hash_pending -= 1
+
+async def hash_password_async(password: str) -> str:
+    """hash_password on the hashing pool."""
+    return await _run_hash_job("hash", pwd_context.hash, password)
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Verifies on the hashing pool. Returns (valid, new_hash); new_hash is set
+    when the stored hash is deprecated or below the configured cost and
+    should replace it.
+    """
+    return await _run_hash_job(
+        "verify", pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
 # ─── JWT Tokens ───────────────────────────────────────────────
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=False)
 
@@ -62,12 +174,105 @@ def decode_access_token(token: str) -> dict:
         )
 
 
+# ─── Principal Cache ─────────────────────────────────────────
+# get_current_user runs on every authenticated request. Verified claims and a
+# lightweight user snapshot are cached per token digest for a short TTL (never
+# past the token's own exp), so hot paths skip both the signature check and the
+# users lookup. Entries are dropped when the user's row changes in this worker;
+# other workers converge within PRINCIPAL_CACHE_TTL_SECONDS.
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Read-only copy of the User columns authenticated endpoints read."""
+    id: int
+    email: str
+    full_name: Optional[str]
+    auth_provider: Optional[str]
+    encrypted_preferences: Optional[str]
+    encrypted_struggle_areas: Optional[str]
+    granularity_level: Optional[int]
+    streak_count: Optional[int]
+    total_completed: Optional[int]
+    last_completion_date: Optional[date]
+
+    @classmethod
+    def from_user(cls, user) -> "UserSnapshot":
+        return cls(**{f.name: getattr(user, f.name) for f in fields(cls)})
+
+
+class PrincipalCache:
+    def __init__(
+        self,
+        ttl_seconds: int = settings.PRINCIPAL_CACHE_TTL_SECONDS,
+        max_entries: int = settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # token digest -> (expires_at, claims, snapshot)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._by_user: Dict[int, Set[str]] = defaultdict(set)
+        metrics.gauge("principal_cache.entries", lambda: len(self._entries))
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token_digest: str) -> Optional[Tuple[dict, UserSnapshot]]:
+        entry = self._entries.get(token_digest)
+        if entry is None:
+            metrics.incr("principal_cache.misses")
+            return None
+        expires_at, claims, snapshot = entry
+        if expires_at <= time.time():
+            self._drop(token_digest)
+            metrics.incr("principal_cache.misses")
+            return None
+        self._entries.move_to_end(token_digest)
+        metrics.incr("principal_cache.hits")
+        return claims, snapshot
+
+    def put(self, token_digest: str, claims: dict, snapshot: UserSnapshot):
+        if self.ttl_seconds <= 0:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        if claims.get("exp") is not None:
+            expires_at = min(expires_at, float(claims["exp"]))
+        self._drop(token_digest)
+        self._entries[token_digest] = (expires_at, claims, snapshot)
+        self._by_user[snapshot.id].add(token_digest)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int):
+        for token_digest in self._by_user.pop(user_id, set()):
+            self._entries.pop(token_digest, None)
+
+    def _drop(self, token_digest: str):
+        entry = self._entries.pop(token_digest, None)
+        if entry is not None:
+            user_tokens = self._by_user.get(entry[2].id)
+            if user_tokens is not None:
+                user_tokens.discard(token_digest)
+                if not user_tokens:
+                    del self._by_user[entry[2].id]
+
+
+principal_cache = PrincipalCache()
+
+def invalidate_principal(user_id: int):
+    """Call after any write to a user's row so /auth/me & co. see it at once."""
+    principal_cache.invalidate_user(user_id)
+
+
 # ─── Current User Dependency ─────────────────────────────────
 async def get_current_user(
     token: Optional[str] = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db),
-):
-    """FastAPI dependency: extract the current user from the JWT token."""
+) -> UserSnapshot:
+    """
+    FastAPI dependency: extract the current user from the JWT token.
+    Returns a UserSnapshot; on a principal-cache hit the request session
+    never checks out a connection.
+    """
     if token is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -75,6 +280,11 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    token_digest = principal_cache.digest(token)
+    cached = principal_cache.get(token_digest)
+    if cached is not None:
+        return cached[1]
+
     payload = decode_access_token(token)
     user_id: int = payload.get("sub")
     if user_id is None:
@@ -91,4 +301,6 @@ async def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
-    return user
+    snapshot = UserSnapshot.from_user(user)
+    principal_cache.put(token_digest, payload, snapshot)
+    return snapshot
@@ -0,0 +1,207 @@
+# Static serving for the bundled SPA (backend/static, built by Vite).
+# The directory is scanned once at startup into an in-memory manifest; requests
+# are answered from that manifest only, so nothing outside it can be served
+# and no filesystem stat happens per request.
+#
+# Precompress at build time (writes .gz/.br next to each file):
+#   python -m app.core.static_files static
+import gzip
+import hashlib
+import mimetypes
+import os
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from fastapi.responses import FileResponse, Response
+
+from app.core.etag import etag_matches
+from app.core.metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only without it
+    brotli = None
+
+# Vite emits content-hashed file names under assets/
+IMMUTABLE = "public, max-age=31536000, immutable"
+SHORT = "public, max-age=3600"
+INDEX = "no-cache"
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml", "application/xml")
+MIN_COMPRESS_BYTES = 1024
+MAX_MEMORY_BYTES = 4 * 1024 * 1024   # larger files are streamed from disk
+
+_SIDECARS = {"br": ".br", "gzip": ".gz"}
+
+
+@dataclass
+class _Asset:
+    path: str
+    content_type: str
+    cache_control: str
+    etag: str
+    body: Optional[bytes]                                       # None = stream from disk
+    variants: Dict[str, bytes] = field(default_factory=dict)    # encoding -> compressed body
+
+
+def _compress(data: bytes, encoding: str) -> Optional[bytes]:
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(data, quality=11)
+    return None
+
+
+def _is_compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _content_type(rel_path: str) -> str:
+    guessed, _ = mimetypes.guess_type(rel_path)
+    if rel_path.endswith((".js", ".mjs")):
+        guessed = "application/javascript"
+    guessed = guessed or "application/octet-stream"
+    if guessed.startswith("text/") or guessed == "application/javascript":
+        guessed += "; charset=utf-8"
+    return guessed
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Accept-Encoding -> {coding: q}; codings with q=0 are left out."""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if q > 0:
+            accepted[coding] = q
+    return accepted
+
+
+def is_safe_path(rel_path: str) -> bool:
+    """Reject traversal attempts and other paths that can never be in the manifest."""
+    if "\\" in rel_path or "\x00" in rel_path or rel_path.startswith("/"):
+        return False
+    return all(part not in ("..", ".") for part in rel_path.split("/"))
+
+
+class StaticSite:
+    def __init__(self, root: str):
+        self.root = os.path.realpath(root)
+        self.manifest: Dict[str, _Asset] = {}
+        self._build()
+        self.index = self.manifest.get("index.html")
+        metrics.gauge("static.files", lambda: len(self.manifest))
+
+    def _build(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith((".gz", ".br")):
+                    continue
+                full_path = os.path.join(dirpath, name)
+                rel_path = os.path.relpath(full_path, self.root).replace(os.sep, "/")
+                self.manifest[rel_path] = self._load(rel_path, full_path)
+
+    def _load(self, rel_path: str, full_path: str) -> _Asset:
+        content_type = _content_type(rel_path)
+        if rel_path == "index.html":
+            cache_control = INDEX
+        elif rel_path.startswith("assets/"):
+            cache_control = IMMUTABLE
+        else:
+            cache_control = SHORT
+
+        size = os.path.getsize(full_path)
+        if size > MAX_MEMORY_BYTES:
+            stat = os.stat(full_path)
+            etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+            return _Asset(full_path, content_type, cache_control, etag, body=None)
+
+        with open(full_path, "rb") as f:
+            body = f.read()
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        asset = _Asset(full_path, content_type, cache_control, etag, body)
+
+        if _is_compressible(content_type) and size >= MIN_COMPRESS_BYTES:
+            for encoding, suffix in _SIDECARS.items():
+                sidecar = full_path + suffix
+                if os.path.isfile(sidecar):
+                    with open(sidecar, "rb") as f:
+                        compressed = f.read()
+                else:
+                    compressed = _compress(body, encoding)
+                # Not worth a Vary'd variant unless it saves at least 10%
+                if compressed is not None and len(compressed) < size * 0.9:
+                    asset.variants[encoding] = compressed
+        return asset
+
+    def lookup(self, rel_path: str) -> Optional[_Asset]:
+        return self.manifest.get(rel_path)
+
+    def respond(self, asset: _Asset, request_headers, head: bool = False) -> Response:
+        headers = {"Cache-Control": asset.cache_control}
+        if asset.variants:
+            headers["Vary"] = "Accept-Encoding"
+
+        encoding = None
+        if asset.variants:
+            accepted = _accepted_encodings(request_headers.get("accept-encoding", ""))
+            candidates = [e for e in ("br", "gzip") if e in asset.variants and e in accepted]
+            if candidates:
+                encoding = max(candidates, key=lambda e: accepted[e])
+
+        # Each representation needs its own strong validator
+        etag = asset.etag if encoding is None else asset.etag[:-1] + "-" + encoding + '"'
+        headers["ETag"] = etag
+        if etag_matches(request_headers.get("if-none-match"), etag):
+            metrics.incr("static.not_modified")
+            return Response(status_code=304, headers=headers)
+
+        if asset.body is None:
+            return FileResponse(asset.path, media_type=asset.content_type, headers=headers)
+
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+            body = asset.variants[encoding]
+            metrics.incr(f"static.served.{encoding}")
+        else:
+            body = asset.body
+            metrics.incr("static.served.identity")
+        if head:
+            headers["Content-Length"] = str(len(body))
+            return Response(status_code=200, media_type=asset.content_type, headers=headers)
+        return Response(content=body, media_type=asset.content_type, headers=headers)
+
+
+def precompress(root: str):
+    """Write .gz (and .br, if brotli is installed) next to every compressible file."""
+    written = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if name.endswith((".gz", ".br")):
+                continue
+            full_path = os.path.join(dirpath, name)
+            if not _is_compressible(_content_type(name)) or os.path.getsize(full_path) < MIN_COMPRESS_BYTES:
+                continue
+            with open(full_path, "rb") as f:
+                body = f.read()
+            for encoding, suffix in _SIDECARS.items():
+                compressed = _compress(body, encoding)
+                if compressed is not None:
+                    with open(full_path + suffix, "wb") as f:
+                        f.write(compressed)
+                    written += 1
+    print(f"✅ Precompressed {written} static variants in {root}" + ("" if brotli else " (gzip only, brotli not installed)"))
+
+
+if __name__ == "__main__":
+    precompress(sys.argv[1] if len(sys.argv) > 1 else "static")
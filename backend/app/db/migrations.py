@@ -0,0 +1,183 @@
+# Versioned schema migrations (PostgreSQL).
+# Every entry runs once, in order, and is recorded in the schema_version table.
+# Append new migrations to the end of MIGRATIONS; never edit or reorder one
+# that has shipped. Run with: python migrate.py
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.db.session import Base
+
+# Arbitrary constant for pg_advisory_lock so only one process migrates at a time
+_LOCK_KEY = 70_531_018
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    statements: List[str] = field(default_factory=list)
+    # Runs against the sync connection inside the migration's transaction
+    run_sync: Optional[Callable] = None
+    # Statements that cannot run inside a transaction (CREATE INDEX CONCURRENTLY)
+    autocommit: bool = False
+    # For concurrent index builds: name of the index, so a build that failed
+    # halfway (left INVALID by Postgres) is dropped and retried
+    index_name: Optional[str] = None
+
+
+def _create_baseline(sync_conn):
+    # Import models so every table is registered on Base.metadata
+    from app.models.task import Task, MicroWinModel  # noqa: F401
+    from app.models.user import User  # noqa: F401
+    Base.metadata.create_all(sync_conn)
+
+
+MIGRATIONS = [
+    # Fresh databases get the tables straight from the models; databases
+    # created by the old create_all-on-boot are left as they are and brought
+    # up to date by the idempotent steps below.
+    Migration(1, "baseline_tables", run_sync=_create_baseline),
+    # Formerly migrate_auth.py
+    Migration(2, "user_auth_provider", [
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS auth_provider VARCHAR DEFAULT 'email'",
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS provider_id VARCHAR",
+        "ALTER TABLE users ALTER COLUMN hashed_password DROP NOT NULL",
+    ]),
+    # Formerly migrate_name.py
+    Migration(3, "user_full_name", [
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS full_name VARCHAR",
+    ]),
+    # Formerly migrate_gamification.py
+    Migration(4, "user_gamification", [
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS streak_count INTEGER DEFAULT 0",
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS last_completion_date DATE",
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS total_completed INTEGER DEFAULT 0",
+    ]),
+    # Formerly migrate_progress_counters.py
+    Migration(5, "task_progress_counters", [
+        "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS total_steps INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS completed_steps INTEGER NOT NULL DEFAULT 0",
+        """
+        UPDATE tasks t
+        SET total_steps = s.total,
+            completed_steps = s.done
+        FROM (
+            SELECT task_id,
+                   COUNT(*) AS total,
+                   COUNT(*) FILTER (WHERE is_completed) AS done
+            FROM micro_wins
+            GROUP BY task_id
+        ) s
+        WHERE t.id = s.task_id
+        """,
+    ]),
+    # Sidebar / paginated listing: WHERE user_id = ? ORDER BY id DESC
+    Migration(6, "tasks_user_id_id_index", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_user_id_id ON tasks (user_id, id DESC)",
+    ], autocommit=True, index_name="ix_tasks_user_id_id"),
+    # Step lookups per task, already in display order
+    Migration(7, "micro_wins_task_id_step_order_index", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_micro_wins_task_id_step_order "
+        "ON micro_wins (task_id, step_order)",
+    ], autocommit=True, index_name="ix_micro_wins_task_id_step_order"),
+    # Idempotency-Key of the POST that created a task (resumable streams)
+    Migration(8, "task_idempotency_key", [
+        "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR",
+    ]),
+    # One task per (user, Idempotency-Key); also the lookup for retried POSTs
+    Migration(9, "tasks_user_id_idempotency_key_index", [
+        "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_user_id_idempotency_key "
+        "ON tasks (user_id, idempotency_key) WHERE idempotency_key IS NOT NULL",
+    ], autocommit=True, index_name="ix_tasks_user_id_idempotency_key"),
+    # Resumes from the DB mark unfinished streams as partial. Existing tasks
+    # are done streaming; new ones start out unfinished.
+    Migration(10, "task_stream_finished", [
+        "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS stream_finished BOOLEAN NOT NULL DEFAULT TRUE",
+        "ALTER TABLE tasks ALTER COLUMN stream_finished SET DEFAULT FALSE",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+async def _ensure_version_table(conn: AsyncConnection):
+    await conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+
+
+async def _applied_versions(conn: AsyncConnection) -> set:
+    result = await conn.execute(text("SELECT version FROM schema_version"))
+    return set(result.scalars())
+
+
+async def _record(conn: AsyncConnection, migration: Migration):
+    await conn.execute(
+        text("INSERT INTO schema_version (version, name) VALUES (:version, :name)"),
+        {"version": migration.version, "name": migration.name},
+    )
+
+
+async def _drop_invalid_index(conn: AsyncConnection, index_name: str):
+    valid = (await conn.execute(text("""
+        SELECT i.indisvalid
+        FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid
+        WHERE c.relname = :name
+    """), {"name": index_name})).scalar()
+    if valid is False:
+        print(f"Dropping invalid index {index_name} left by an interrupted build")
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}"))
+
+
+async def _apply(engine: AsyncEngine, migration: Migration):
+    if migration.autocommit:
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            if migration.index_name:
+                await _drop_invalid_index(conn, migration.index_name)
+            for sql in migration.statements:
+                await conn.execute(text(sql))
+            await _record(conn, migration)
+        return
+
+    # Schema change and version row commit (or roll back) together
+    async with engine.begin() as conn:
+        if migration.run_sync:
+            await conn.run_sync(migration.run_sync)
+        for sql in migration.statements:
+            await conn.execute(text(sql))
+        await _record(conn, migration)
+
+
+async def pending_migrations(engine: AsyncEngine) -> List[Migration]:
+    async with engine.connect() as conn:
+        exists = (await conn.execute(text("SELECT to_regclass('schema_version')"))).scalar()
+        applied = await _applied_versions(conn) if exists else set()
+    return [m for m in MIGRATIONS if m.version not in applied]
+
+
+async def run_migrations(engine: AsyncEngine) -> int:
+    """Apply every pending migration in order. Returns how many ran."""
+    async with engine.connect() as lock_conn:
+        lock_conn = await lock_conn.execution_options(isolation_level="AUTOCOMMIT")
+        await lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _LOCK_KEY})
+        try:
+            await _ensure_version_table(lock_conn)
+            applied = await _applied_versions(lock_conn)
+            ran = 0
+            for migration in MIGRATIONS:
+                if migration.version in applied:
+                    continue
+                print(f"Applying migration {migration.version:04d} {migration.name}...")
+                await _apply(engine, migration)
+                ran += 1
+            return ran
+        finally:
+            await lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _LOCK_KEY})
@@ -1,17 +1,68 @@
+import time
+from fastapi import Request
+from sqlalchemy import exc
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import DeclarativeBase # <--- Add this import
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.core.metrics import metrics
 
 # 1. Define the Base class here
 class Base(DeclarativeBase):
     pass
 
 # 2. Engine setup
-engine = create_async_engine(
-    settings.DATABASE_URL, 
-    echo=False,
-    pool_pre_ping=True 
-)
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that reports how long each checkout waited for a connection."""
+
+    metrics_prefix = "db.pool"
+
+    def _do_get(self):
+        t_start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            metrics.incr(f"{self.metrics_prefix}.checkout_timeouts")
+            raise
+        finally:
+            metrics.observe(f"{self.metrics_prefix}.checkout_wait_ms", (time.perf_counter() - t_start) * 1000)
+
+
+def _connect_args(url: str) -> dict:
+    if url.startswith("postgresql+asyncpg"):
+        return {"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+    return {}
+
+
+def _create_engine(url: str, metrics_prefix: str):
+    # A subclass per engine so pool.recreate() keeps the metrics prefix
+    pool_class = type(f"InstrumentedPool[{metrics_prefix}]", (InstrumentedPool,), {"metrics_prefix": metrics_prefix})
+    new_engine = create_async_engine(
+        url, 
+        echo=False,
+        poolclass=pool_class,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=_connect_args(url),
+    )
+    metrics.gauge(f"{metrics_prefix}.size", lambda: new_engine.pool.size())
+    metrics.gauge(f"{metrics_prefix}.checked_out", lambda: new_engine.pool.checkedout())
+    metrics.gauge(f"{metrics_prefix}.idle", lambda: new_engine.pool.checkedin())
+    # overflow() starts at -pool_size; only connections beyond pool_size count as overflow
+    metrics.gauge(f"{metrics_prefix}.overflow", lambda: max(new_engine.pool.overflow(), 0))
+    return new_engine
+
+
+engine = _create_engine(settings.DATABASE_URL, "db.pool")
+
+# Read-only traffic goes to the replica when one is configured
+if settings.DATABASE_READ_URL:
+    read_engine = _create_engine(settings.DATABASE_READ_URL, "db.read_pool")
+else:
+    read_engine = engine
 
 AsyncSessionLocal = async_sessionmaker(
     bind=engine, 
@@ -19,6 +70,88 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False
 )
 
+ReadSessionLocal = async_sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
 async def get_db():
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+# ─── Read-your-writes ─────────────────────────────────────────
+class RecentWrites:
+    """
+    Remembers which users/tasks were written to in the last few seconds, so
+    reads about them go to the primary instead of a possibly lagging replica.
+    Per worker process: a follow-up read served by another worker can still
+    land on the replica, so keep the window above typical replication lag.
+    """
+
+    def __init__(self, window_seconds: float = settings.READ_YOUR_WRITES_SECONDS):
+        self.window_seconds = window_seconds
+        self._until = {}   # (kind, id) -> monotonic deadline
+
+    def mark(self, kind: str, key_id):
+        if self.window_seconds <= 0 or key_id is None:
+            return
+        now = time.monotonic()
+        if len(self._until) > 10000:
+            self._until = {k: t for k, t in self._until.items() if t > now}
+        self._until[(kind, int(key_id))] = now + self.window_seconds
+
+    def is_recent(self, kind: str, key_id) -> bool:
+        deadline = self._until.get((kind, int(key_id)))
+        return deadline is not None and deadline > time.monotonic()
+
+
+recent_writes = RecentWrites()
+
+
+def mark_user_write(user_id):
+    recent_writes.mark("user", user_id)
+
+
+def mark_task_write(task_id):
+    recent_writes.mark("task", task_id)
+
+
+def _needs_primary(user_id=None, task_id=None) -> bool:
+    return (
+        (user_id is not None and recent_writes.is_recent("user", user_id))
+        or (task_id is not None and recent_writes.is_recent("task", task_id))
+    )
+
+
+def read_sessionmaker(user_id=None, task_id=None) -> async_sessionmaker:
+    """
+    Session factory for reads about the given user/task: the replica when one
+    is configured, the primary right after a write to either of them.
+    """
+    if read_engine is engine:
+        return AsyncSessionLocal
+    if _needs_primary(user_id, task_id):
+        metrics.incr("db.read.sticky_primary")
+        return AsyncSessionLocal
+    metrics.incr("db.read.replica")
+    return ReadSessionLocal
+
+
+def _id_param(request: Request, name: str):
+    value = request.path_params.get(name, request.query_params.get(name))
+    return int(value) if value is not None and str(value).isdigit() else None
+
+
+async def get_read_db(request: Request):
+    """
+    Session for read-only endpoints. Uses the replica (DATABASE_READ_URL) if
+    configured, except right after a write to the same user_id / task_id
+    found in the path or query, which is served by the primary.
+    """
+    session_factory = read_sessionmaker(
+        user_id=_id_param(request, "user_id"), task_id=_id_param(request, "task_id")
+    )
+    async with session_factory() as session:
+        yield session
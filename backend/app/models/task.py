@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Boolean, LargeBinary, ForeignKey,String
+from sqlalchemy import Column, Integer, Boolean, LargeBinary, ForeignKey,String, Index, text
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
@@ -10,6 +10,19 @@ class Task(Base):
     encrypted_goal = Column(String, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"))
     is_completed = Column(Boolean, default=False)
+
+    # Denormalized progress, maintained atomically by the stream writer and
+    # the step-completion endpoint (backfilled by migration 0005)
+    total_steps = Column(Integer, default=0, nullable=False)
+    completed_steps = Column(Integer, default=0, nullable=False)
+
+    # Client-supplied Idempotency-Key of the POST that created this task,
+    # so retries of that request attach to it instead of generating again
+    idempotency_key = Column(String, nullable=True)
+
+    # Set once the decomposition stream has ended (done, failed or cut off),
+    # so a resume served from the DB knows whether more steps may follow
+    stream_finished = Column(Boolean, default=False, nullable=False, server_default=text("false"))
     
     # User Relationship
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True) # Set nullable=False later after auth
@@ -17,6 +30,13 @@ class Task(Base):
 
     micro_wins = relationship("MicroWinModel", back_populates="parent_task", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index(
+            "ix_tasks_user_id_idempotency_key", "user_id", "idempotency_key",
+            unique=True, postgresql_where=text("idempotency_key IS NOT NULL"),
+        ),
+    )
+
 class MicroWinModel(Base):
     __tablename__ = "micro_wins"
 
@@ -28,6 +28,14 @@ class MicroWinRead(BaseModel):
     class Config:
         from_attributes = True
 
+# Final event of a decomposition stream: everything the frontend needs
+# (including the persisted step ids) without a follow-up GET /tasks/{id}
+class TaskStreamSummary(BaseModel):
+    id: int
+    title: Optional[str] = None
+    original_goal: str
+    steps: List[MicroWinRead]
+
 class TaskRead(BaseModel):
     id: int
     goal: str    # This will hold the DECRYPTED text
@@ -37,6 +45,36 @@ class TaskRead(BaseModel):
     class Config:
         from_attributes = True
 
+# One page of GET /api/v1/tasks/page
+class TaskPage(BaseModel):
+    items: List[TaskRead]
+    next_cursor: Optional[str] = None  # opaque; null on the last page
 
+# Body of PATCH /api/v1/tasks/microwins (bulk checkbox updates)
+class MicroWinStatusUpdate(BaseModel):
+    step_id: int
+    is_completed: bool
 
+class MicroWinBatchUpdate(BaseModel):
+    updates: List[MicroWinStatusUpdate] = Field(..., min_length=1, max_length=500)
 
+# Sidebar entry with progress counters (bootstrap endpoint)
+class SidebarTaskProgress(BaseModel):
+    id: int
+    title: str
+    is_completed: bool
+    completed_steps: int
+    total_steps: int
+
+# Shape of GET /api/v1/tasks/{task_id}
+class TaskDetailStep(BaseModel):
+    id: int
+    action: str
+    is_completed: bool
+    order: int
+
+class TaskDetail(BaseModel):
+    id: int
+    title: Optional[str] = None
+    goal: str
+    steps: List[TaskDetailStep]
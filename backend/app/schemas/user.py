@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List
+from app.schemas.task import SidebarTaskProgress, TaskDetail
 
 # For initial registration
 class UserCreate(BaseModel):
@@ -38,4 +39,9 @@ class UserRead(BaseModel):
 class TokenResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
-    user: UserRead
\ No newline at end of file
+    user: UserRead
+# GET /api/v1/auth/me/bootstrap: everything the dashboard needs for first paint
+class BootstrapRead(BaseModel):
+    user: UserRead
+    tasks: List[SidebarTaskProgress]
+    latest_task: Optional[TaskDetail] = None
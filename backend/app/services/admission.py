@@ -0,0 +1,158 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from typing import AsyncIterator
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+class _TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class Slot:
+    """One admitted generation. release() is idempotent."""
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._controller._release()
+
+
+class AdmissionController:
+    """
+    Gatekeeper in front of LLM decompositions, per worker process.
+
+    Each user draws from a token bucket (burst LLM_USER_BURST, refilled at
+    LLM_USER_RATE_PER_MINUTE); an empty bucket is a 429 with Retry-After.
+    Admitted requests then need one of LLM_MAX_CONCURRENT generation slots.
+    Up to LLM_QUEUE_SIZE requests wait for a slot, each for at most
+    LLM_QUEUE_TIMEOUT_SECONDS; a full queue or an expired wait is a 503 with
+    Retry-After, so an overloaded worker sheds load instead of piling up
+    open streams.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = settings.LLM_MAX_CONCURRENT,
+        queue_size: int = settings.LLM_QUEUE_SIZE,
+        queue_timeout: float = settings.LLM_QUEUE_TIMEOUT_SECONDS,
+        rate_per_minute: float = settings.LLM_USER_RATE_PER_MINUTE,
+        burst: int = settings.LLM_USER_BURST,
+        max_buckets: int = settings.LLM_USER_BUCKETS_MAX,
+    ):
+        self.max_concurrent = max_concurrent
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.rate = rate_per_minute / 60.0   # tokens per second
+        self.burst = burst
+        self.max_buckets = max_buckets
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._in_flight = 0
+        self._waiting = 0
+        self._buckets: "OrderedDict[int, _TokenBucket]" = OrderedDict()
+        metrics.gauge("admission.in_flight", lambda: self._in_flight)
+        metrics.gauge("admission.queue_depth", lambda: self._waiting)
+        metrics.gauge("admission.user_buckets", lambda: len(self._buckets))
+
+    # ─── Per-user rate limit ──────────────────────────────────
+    def _take_token(self, user_id: int) -> float:
+        """Takes a token from the user's bucket. Returns 0, or seconds until one is available."""
+        now = time.monotonic()
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            bucket = _TokenBucket(float(self.burst), now)
+            self._buckets[user_id] = bucket
+            if len(self._buckets) > self.max_buckets:
+                # Least recently used bucket; it is most likely full again anyway
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(user_id)
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return 0.0
+        return (1 - bucket.tokens) / self.rate if self.rate > 0 else float(self.queue_timeout)
+
+    def _refund_token(self, user_id: int):
+        bucket = self._buckets.get(user_id)
+        if bucket is not None:
+            bucket.tokens = min(self.burst, bucket.tokens + 1)
+
+    # ─── Global concurrency ───────────────────────────────────
+    def _reject(self, reason: str, status_code: int, retry_after: float, detail: str):
+        metrics.incr(f"admission.rejected.{reason}")
+        raise HTTPException(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+    async def admit(self, user_id: int) -> Slot:
+        """
+        Admits one decomposition for user_id, waiting for a generation slot if
+        needed. Raises HTTPException (429/503 with Retry-After) when it can't.
+        """
+        wait = self._take_token(user_id)
+        if wait:
+            self._reject(
+                "rate_limited", status.HTTP_429_TOO_MANY_REQUESTS, wait,
+                "Too many decompositions, please slow down.",
+            )
+
+        if self._slots.locked():
+            if self._waiting >= self.queue_size:
+                self._refund_token(user_id)
+                self._reject(
+                    "queue_full", status.HTTP_503_SERVICE_UNAVAILABLE, self.queue_timeout,
+                    "The assistant is busy right now, please retry in a moment.",
+                )
+            self._waiting += 1
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._refund_token(user_id)
+                self._reject(
+                    "timeout", status.HTTP_503_SERVICE_UNAVAILABLE, self.queue_timeout,
+                    "The assistant is busy right now, please retry in a moment.",
+                )
+            finally:
+                self._waiting -= 1
+                metrics.observe("admission.wait_ms", (time.perf_counter() - started) * 1000)
+        else:
+            await self._slots.acquire()
+            metrics.observe("admission.wait_ms", 0.0)
+
+        self._in_flight += 1
+        metrics.incr("admission.admitted")
+        return Slot(self)
+
+    def _release(self):
+        self._in_flight -= 1
+        self._slots.release()
+
+    async def guard(self, slot: Slot, events: AsyncIterator[str]):
+        """Passes events through and releases the slot when the generation ends."""
+        try:
+            async for event in events:
+                yield event
+        finally:
+            slot.release()
+
+
+admission = AdmissionController()
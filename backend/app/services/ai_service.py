@@ -1,29 +1,84 @@
 import json
 import time
+import anyio
 from google import genai
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import update, select
+from sqlalchemy import select
 from app.core.config import settings
-from app.schemas.task import MicroWin, TaskStreamChunk
-from app.models.task import MicroWinModel, Task
+from app.db.session import AsyncSessionLocal
+from app.schemas.task import MicroWin, MicroWinRead, TaskStreamChunk, TaskStreamSummary
 from app.models.user import User
-from app.core.security import encrypt_data, decrypt_data
+from app.core.security import decrypt_data
+from app.services.decomposition_cache import decomposition_cache, make_key
+from app.services.single_flight import llm_flights
+from app.services.step_buffer import StepWriteBuffer
+from app.services.task_queries import build_task_detail, fetch_task_rows
 
 # Initialize Gemini Client
+# All streaming goes through the async surface (client.aio) so that waiting on
+# Gemini yields to the event loop instead of blocking the whole worker.
 client = genai.Client(api_key=settings.GEMINI_API_KEY)
 
-async def stream_micro_wins(safe_instruction: str, task_id: int, user_id: int, db: AsyncSession):
+def _sse(payload: dict) -> str:
+    """Formats a payload as a single SSE data event."""
+    return f"data: {json.dumps(payload)}\n\n"
+
+def _persisted_event(persisted: dict) -> str:
+    """SSE event mapping step orders to the ids they were stored under."""
+    return _sse({
+        "persisted_steps": [
+            {"step_order": order, "step_id": step_id}
+            for order, step_id in sorted(persisted.items())
+        ]
+    })
+
+# ─── Text Sources ─────────────────────────────────────────────
+# stream_micro_wins consumes an async iterator of raw model text (JSON lines),
+# whether it comes from Gemini or from a cached decomposition.
+async def _gemini_text(prompt: str, usage: dict):
+    stream = await client.aio.models.generate_content_stream(
+        model='gemini-2.5-flash', # Using Flash for < 5s latency requirement
+        contents=prompt
+    )
+    async for chunk in stream:
+        if chunk.usage_metadata and chunk.usage_metadata.total_token_count:
+            usage["tokens"] = chunk.usage_metadata.total_token_count
+        if chunk.text:
+            yield chunk.text
+
+async def _cached_text(entry: dict):
+    """Replays a cached decomposition in the model's own line format."""
+    if entry.get("title"):
+        yield json.dumps({"title": entry["title"]}) + "\n"
+    for action in entry["actions"]:
+        yield json.dumps({"action": action}) + "\n"
+    yield json.dumps({"status": "end"}) + "\n"
+
+async def stream_micro_wins(safe_instruction: str, task_id: int, user_id: int):
     """
     Fetches user neuro-profile, customizes the prompt, and streams tasks.
     Includes latency metrics as SSE events to satisfy the <5s requirement.
+
+    Identical requests (same normalized goal, granularity and profile) are
+    answered from the decomposition cache, replayed as the same SSE sequence,
+    or, while one is still generating, attached to that in-flight Gemini
+    stream. Every request still persists its own Task / MicroWinModel rows.
+
+    The stream never holds a database session while waiting on Gemini: the
+    profile read and the batched writes (see StepWriteBuffer) each open their
+    own short-lived session, so pooled connections are only checked out for
+    actual DB work, not for the lifetime of the SSE stream.
     """
     # ─── Latency Timer Start ──────────────────────────────────
     t_start = time.perf_counter()
     first_token_emitted = False
 
+    # Tells the client which task to resume (GET /tasks/{id}/stream) if it drops
+    yield _sse({"task_id": task_id})
+
     # 1. Fetch User Profile for Individualization
-    user_result = await db.execute(select(User).where(User.id == user_id))
-    user = user_result.scalar_one_or_none()
+    async with AsyncSessionLocal() as db:
+        user_result = await db.execute(select(User).where(User.id == user_id))
+        user = user_result.scalar_one_or_none()
     
     # Decrypt preferences if they exist
     preferences = decrypt_data(user.encrypted_preferences) if user and user.encrypted_preferences else "None"
@@ -48,24 +103,37 @@ async def stream_micro_wins(safe_instruction: str, task_id: int, user_id: int, d
         "{\"status\": \"end\"}"
     )
 
-    try:
-        stream = client.models.generate_content_stream(
-            model='gemini-2.5-flash', # Using Flash for < 5s latency requirement
-            contents=prompt
+    cache_key = make_key(safe_instruction, granularity, preferences, struggles)
+    cached = await decomposition_cache.get(cache_key)
+    usage = {}
+    is_leader = False
+    if cached:
+        source = _cached_text(cached)
+    else:
+        # Same key already streaming from Gemini? Attach to it instead.
+        source, is_leader = llm_flights.subscribe(
+            cache_key, lambda: _gemini_text(prompt, usage)
         )
 
+    writes = StepWriteBuffer(task_id, user_id)
+    title = None
+    streamed_steps = []   # (step_order, action) in emission order
+    step_ids = {}         # step_order -> persisted MicroWinModel.id
+
+    try:
         buffer = ""
         step_counter = 1
+        ended = False
         
-        for chunk in stream:
-            if chunk.text:
+        async for text in source:
+            if text:
                 # ─── Time-to-First-Token ──────────────────────
                 if not first_token_emitted:
                     ttft_ms = round((time.perf_counter() - t_start) * 1000)
                     yield f"data: {{\"latency_ms\": {ttft_ms}}}\n\n"
                     first_token_emitted = True
 
-                buffer += chunk.text
+                buffer += text
                 
                 if "\n" in buffer:
                     lines = buffer.split("\n")
@@ -78,33 +146,30 @@ async def stream_micro_wins(safe_instruction: str, task_id: int, user_id: int, d
 
                             # Handle AI-Generated Title
                             if "title" in raw_data:
-                                stmt = update(Task).where(Task.id == task_id).values(title=raw_data["title"])
-                                await db.execute(stmt)
-                                await db.commit()
-                                yield f"data: {{\"sidebar_title\": \"{raw_data['title']}\"}}\n\n"
+                                title = raw_data["title"]
+                                writes.set_title(title)
+                                # Committed before the event: the client reloads
+                                # the sidebar as soon as it sees sidebar_title
+                                persisted = await writes.flush()
+                                yield _sse({"sidebar_title": title})
+                                if persisted:
+                                    step_ids.update(persisted)
+                                    yield _persisted_event(persisted)
                                 continue
                             
                             if raw_data.get("status") == "end":
-                                # ─── Total Latency ────────────────────
-                                total_ms = round((time.perf_counter() - t_start) * 1000)
-                                yield f"data: {{\"total_latency_ms\": {total_ms}}}\n\n"
-                                return 
+                                ended = True
+                                break
 
                             action_text = raw_data.get("action")
                             if action_text:
-                                # Encrypting for Privacy-First Cloud storage
-                                encrypted_action = encrypt_data(action_text)
-                                
-                                new_step = MicroWinModel(
-                                    task_id=task_id,
-                                    encrypted_action=encrypted_action,
-                                    is_completed=False,
-                                    step_order=step_counter
-                                )
-                                db.add(new_step)
-                                await db.commit()
+                                # Persisted by the write-behind buffer
+                                writes.add_step(step_counter, action_text)
+                                streamed_steps.append((step_counter, action_text))
 
-                                # Yield for UI
+                                # Yield for UI. step_id is the step order until the
+                                # batch is written; the real ids follow in a
+                                # "persisted_steps" event and in the final summary.
                                 chunk_data = TaskStreamChunk(
                                     id=task_id,
                                     original_goal=safe_instruction,
@@ -116,14 +181,92 @@ async def stream_micro_wins(safe_instruction: str, task_id: int, user_id: int, d
                                 yield f"data: {chunk_data.model_dump_json()}\n\n"
                                 step_counter += 1
 
+                            if writes.should_flush():
+                                persisted = await writes.flush()
+                                if persisted:
+                                    step_ids.update(persisted)
+                                    yield _persisted_event(persisted)
+
                         except json.JSONDecodeError:
                             continue
                     
                     buffer = lines[-1]
 
-        # If stream ends without explicit "end" status, still emit total latency
+            if ended:
+                break
+
+        # ─── Final flush + Task Summary ───────────────────────
+        # Also reached when the stream ends without an explicit "end" status
+        persisted = await writes.flush()
+        if persisted:
+            step_ids.update(persisted)
+            yield _persisted_event(persisted)
+
+        summary = TaskStreamSummary(
+            id=task_id,
+            title=title,
+            original_goal=safe_instruction,
+            steps=[
+                MicroWinRead(id=step_ids[order], step_order=order, action=action, is_completed=False)
+                for order, action in streamed_steps
+            ],
+        )
+        yield f"data: {{\"task_summary\": {summary.model_dump_json()}}}\n\n"
+
+        # ─── Total Latency ────────────────────────────────────
         total_ms = round((time.perf_counter() - t_start) * 1000)
         yield f"data: {{\"total_latency_ms\": {total_ms}}}\n\n"
 
+        if is_leader:
+            await decomposition_cache.set(cache_key, {
+                "title": title,
+                "actions": [action for _, action in streamed_steps],
+                "latency_ms": total_ms,
+                "tokens": usage.get("tokens"),
+            })
+
     except Exception as e:
-        yield f"data: {{\"error\": \"AI Stream Error: {str(e)}\"}}\n\n"
\ No newline at end of file
+        yield f"data: {{\"error\": \"AI Stream Error: {str(e)}\"}}\n\n"
+
+    finally:
+        # Runs on normal end, errors and client disconnects alike. Shielded so
+        # the cancellation that tears down a dropped SSE response cannot
+        # interrupt the final write.
+        with anyio.CancelScope(shield=True):
+            await source.aclose()
+            writes.finish()
+            await writes.flush()
+
+
+async def replay_persisted(task_id: int):
+    """
+    Rebuilds a decomposition stream from the database, for reconnects whose
+    replay buffer is gone (finished long ago, other worker, restart).
+    No model call: the steps persisted so far are sent as one task_summary.
+    If the stream hasn't finished yet (it may still be generating on another
+    worker) they are sent as a "partial_summary" with "partial": true
+    instead, so the client knows to reconnect later.
+    """
+    async with AsyncSessionLocal() as db:
+        rows = await fetch_task_rows(db, task_id)
+    detail = await build_task_detail(rows) if rows else None
+
+    yield _sse({"task_id": task_id})
+    if detail is None:
+        yield _sse({"error": "Could not load task"})
+        return
+    if detail["title"]:
+        yield _sse({"sidebar_title": detail["title"]})
+    summary = TaskStreamSummary(
+        id=task_id,
+        title=detail["title"],
+        original_goal=detail["goal"],
+        steps=[
+            MicroWinRead(id=s["id"], step_order=s["order"], action=s["action"], is_completed=s["is_completed"])
+            for s in detail["steps"]
+        ],
+    )
+    if rows[0].stream_finished:
+        yield f"data: {{\"task_summary\": {summary.model_dump_json()}}}\n\n"
+    else:
+        yield f"data: {{\"partial\": true, \"partial_summary\": {summary.model_dump_json()}}}\n\n"
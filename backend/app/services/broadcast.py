@@ -0,0 +1,75 @@
+import asyncio
+import time
+from typing import AsyncIterator, Callable, Optional, Tuple
+
+_running = set()   # strong refs so running producers aren't GC'd
+
+
+class Broadcast:
+    """
+    Everything one background producer has yielded so far, readable by any
+    number of consumers, each from its own position however late it joins.
+
+    The producer runs in its own task, independent of its consumers, so one
+    of them going away does not cut off the others. Shared by SingleFlight
+    (coalesced Gemini text) and StreamReplay (resumable SSE events).
+    """
+
+    def __init__(self):
+        self.items = []
+        self.done = False
+        self.error: Optional[Exception] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Condition()
+
+    def start(self, source: AsyncIterator, on_done: Optional[Callable[[], None]] = None) -> "Broadcast":
+        """Run source in the background. on_done runs right before consumers see the end."""
+        self.task = asyncio.create_task(self._pump(source, on_done))
+        _running.add(self.task)
+        self.task.add_done_callback(_running.discard)
+        return self
+
+    async def _pump(self, source: AsyncIterator, on_done):
+        try:
+            async for item in source:
+                async with self._changed:
+                    self.items.append(item)
+                    self._changed.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            if on_done is not None:
+                on_done()
+            async with self._changed:
+                self.done = True
+                self.finished_at = time.monotonic()
+                self._changed.notify_all()
+
+    async def wait(self, position: int, timeout: Optional[float] = None) -> Tuple[list, bool]:
+        """
+        (items after position, producer finished), as soon as there is
+        either. Returns ([], False) if timeout seconds pass first.
+        """
+        async with self._changed:
+            ready = self._changed.wait_for(lambda: len(self.items) > position or self.done)
+            if timeout is None:
+                await ready
+            else:
+                try:
+                    await asyncio.wait_for(ready, timeout=timeout)
+                except asyncio.TimeoutError:
+                    return [], False
+            return self.items[position:], self.done
+
+    async def follow(self, position: int = 0):
+        """Every item from position on; re-raises the producer's error at the end."""
+        while True:
+            available, finished = await self.wait(position)
+            for item in available:
+                yield item
+            position += len(available)
+            if finished and position >= len(self.items):
+                if self.error:
+                    raise self.error
+                return
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from cryptography.fernet import InvalidToken
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.security import decrypt_data, encrypt_data
+
+
+def normalize_instruction(text: str) -> str:
+    """Case/whitespace/trailing-punctuation insensitive form of a goal."""
+    return re.sub(r"\s+", " ", text).strip().rstrip(".!?").strip().lower()
+
+
+def profile_hash(preferences: str, struggles: str) -> str:
+    """Digest of the decrypted neuro-profile; the plaintext never enters a key."""
+    return hashlib.sha256(json.dumps([preferences, struggles]).encode()).hexdigest()
+
+
+def make_key(safe_instruction: str, granularity: int, preferences: str, struggles: str) -> str:
+    raw = json.dumps([
+        normalize_instruction(safe_instruction),
+        granularity,
+        profile_hash(preferences, struggles),
+    ])
+    return "decomp:" + hashlib.sha256(raw.encode()).hexdigest()
+
+
+class _MemoryBackend:
+    """Per-process LRU with TTL eviction."""
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+
+    async def get(self, key: str) -> Optional[dict]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: dict):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class _RedisBackend:
+    """
+    Shared backend so every worker/replica sees the same entries.
+    Titles and actions leave the process, so entries are stored
+    Fernet-encrypted like everything else at rest.
+    """
+
+    def __init__(self, url: str, ttl_seconds: int):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError(
+                "DECOMPOSITION_CACHE_REDIS_URL is set but the 'redis' package is not installed"
+            )
+        self.ttl_seconds = ttl_seconds
+        self._redis = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[dict]:
+        raw = await self._redis.get(key)
+        if not raw:
+            return None
+        try:
+            return json.loads(decrypt_data(raw))
+        except InvalidToken:
+            # Written under another DB_ENCRYPTION_KEY, or before entries were encrypted
+            return None
+
+    async def set(self, key: str, value: dict):
+        await self._redis.set(key, encrypt_data(json.dumps(value)), ex=self.ttl_seconds)
+
+
+class DecompositionCache:
+    """
+    Cache of finished decompositions: {"title", "actions", "latency_ms", "tokens"}.
+
+    Keyed by the normalized scrubbed instruction, the granularity level and a
+    hash of the decrypted preferences/struggles, so only users with the same
+    neuro-profile share entries. Backend errors degrade to a cache miss.
+    """
+
+    def __init__(self):
+        self.enabled = settings.DECOMPOSITION_CACHE_ENABLED
+        self.hits = 0
+        self.misses = 0
+        if settings.DECOMPOSITION_CACHE_REDIS_URL:
+            self._backend = _RedisBackend(
+                settings.DECOMPOSITION_CACHE_REDIS_URL, settings.DECOMPOSITION_CACHE_TTL_SECONDS
+            )
+        else:
+            self._backend = _MemoryBackend(
+                settings.DECOMPOSITION_CACHE_MAX_ENTRIES, settings.DECOMPOSITION_CACHE_TTL_SECONDS
+            )
+            metrics.gauge("decomposition_cache.entries", lambda: len(self._backend))
+        metrics.gauge("decomposition_cache.hit_rate", self.hit_rate)
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return round(self.hits / lookups, 3) if lookups else 0.0
+
+    async def get(self, key: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        try:
+            entry = await self._backend.get(key)
+        except Exception as e:
+            print(f"Decomposition cache read failed: {e}")
+            entry = None
+        if entry is None:
+            self.misses += 1
+            metrics.incr("decomposition_cache.misses")
+            return None
+        self.hits += 1
+        metrics.incr("decomposition_cache.hits")
+        metrics.incr("decomposition_cache.saved_latency_ms", entry.get("latency_ms") or 0)
+        metrics.incr("decomposition_cache.saved_tokens", entry.get("tokens") or 0)
+        return entry
+
+    async def set(self, key: str, entry: dict):
+        if not self.enabled or not entry.get("actions"):
+            return
+        try:
+            await self._backend.set(key, entry)
+        except Exception as e:
+            print(f"Decomposition cache write failed: {e}")
+
+
+decomposition_cache = DecompositionCache()
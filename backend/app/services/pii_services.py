@@ -1,13 +1,296 @@
+import asyncio
+import multiprocessing
+import os
+import re
+import resource
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
 import spacy
 
-# Load the NLP model (ensure you've run: python -m spacy download en_core_web_sm)
-nlp = spacy.load("en_core_web_sm")
+from app.core.config import settings
+from app.core.metrics import metrics
 
-def scrub_pii(text: str) -> str:
-    doc = nlp(text)
-    scrubbed_text = text
-    # Masking Persons, Locations, and Organizations
+# ─── Lean, Lazily Loaded NER Pipeline ─────────────────────────
+# Scrubbing only reads doc.ents. In en_core_web_sm the "ner" component carries
+# its own internal tok2vec, so the shared tok2vec, tagger, parser, senter,
+# attribute_ruler and lemmatizer are excluded outright (never loaded).
+# (ensure you've run: python -m spacy download en_core_web_sm)
+_nlp = None
+_nlp_lock = threading.Lock()
+_load_stats = {}
+
+def _rss_bytes() -> int:
+    """Current resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is in KiB on Linux (peak, but close enough at load time)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def get_nlp():
+    """Loads the NER-only pipeline on first use (thread-safe)."""
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                rss_before = _rss_bytes()
+                t_start = time.perf_counter()
+                nlp = spacy.load(settings.PII_SPACY_MODEL, exclude=settings.PII_SPACY_EXCLUDE)
+                _load_stats.update({
+                    "pid": os.getpid(),
+                    "load_ms": round((time.perf_counter() - t_start) * 1000, 1),
+                    "model_rss_mb": round((_rss_bytes() - rss_before) / (1024 * 1024), 1),
+                    "components": list(nlp.pipe_names),
+                })
+                print(
+                    f"PII model {settings.PII_SPACY_MODEL} {_load_stats['components']} loaded in "
+                    f"{_load_stats['load_ms']}ms (+{_load_stats['model_rss_mb']}MB RSS, pid {os.getpid()})"
+                )
+                _nlp = nlp
+    return _nlp
+
+def model_load_stats() -> dict:
+    """Load time / memory of the pipeline in this process (loads it if needed)."""
+    get_nlp()
+    return dict(_load_stats)
+
+def _record_load_stats(stats: dict):
+    metrics.observe("pii.model_load_ms", stats["load_ms"])
+    metrics.observe("pii.model_rss_mb", stats["model_rss_mb"])
+
+# ─── Masking ──────────────────────────────────────────────────
+# Persons, Locations, and Organizations come from NER; emails and phone
+# numbers are caught by precompiled patterns before NER ever runs.
+PII_LABELS = {"PERSON", "GPE", "ORG"}
+
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+# Phone-shaped numbers only: an explicit +country code, the North American
+# 3-3-4 grouping, a national number with a leading trunk 0, or one unbroken
+# run of 10-15 digits. Counts, years and page numbers separated by spaces
+# ("pages 100 200 300", "2024 2025 2026") don't fit any of these. A number
+# never starts mid-token (after a digit, "-", ".", "/" or ":") or on a full
+# date, so "2025-03-04 14:00" or "04.03.2025 14:00:30" is left alone.
+_PHONE_RE = re.compile(r"""
+    (?<![\w+./:-])
+    (?!\d{4}([-./])\d{1,2}\1\d{1,2}(?!\d))
+    (?!\d{1,2}([-./])\d{1,2}\2\d{4}(?!\d))
+    (?:
+        \+\d{1,3}(?:[\s.-]?\(?\d{1,4}\)?){2,5}            # +44 20 7946 0958
+      | (?:1[\s.-]?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]\d{4}     # (555) 123-4567
+      | 0\d{1,4}(?:[\s.-]?\d{2,4}){2,4}                   # 06 12 34 56 78
+      | \d{10,15}
+    )
+    (?!\w)
+""", re.VERBOSE)
+_PHONE_DIGITS = range(9, 16)
+# Capitalized words that are not part of a "[LABEL]" placeholder
+_CAPITALIZED_RE = re.compile(r"(?<![\w\[])[A-Z][\w'’-]*")
+
+def _mask_phone(match) -> str:
+    digits = sum(c.isdigit() for c in match.group())
+    return "[PHONE]" if digits in _PHONE_DIGITS else match.group()
+
+def _mask_patterns(text: str) -> str:
+    text = _EMAIL_RE.sub("[EMAIL]", text)
+    return _PHONE_RE.sub(_mask_phone, text)
+
+def _has_entity_candidates(text: str) -> bool:
+    """
+    Cheap pre-check for NER: the small English model practically never tags
+    lowercase text, and goals are mostly imperatives ("Clean my desk"), so the
+    capitalized first word of a sentence doesn't count on its own. NER runs
+    when a capitalized word other than "I" appears mid-sentence, or a
+    sentence starts with a possessive ("Sarah's party") or a name followed by
+    a comma ("Sam, call me").
+    """
+    for match in _CAPITALIZED_RE.finditer(text):
+        word = match.group()
+        base, *suffix = re.split(r"['’]", word)
+        if base == "I":
+            continue
+        # Start of a sentence, line, list item or "Todo:" label
+        preceding = text[:match.start()].rstrip(" \t")
+        sentence_start = not preceding or preceding[-1] in ".!?:;\n-*•"
+        # ...unless it is a possessive or addresses someone ("Sam, call me")
+        if sentence_start and suffix != ["s"] and text[match.end():match.end() + 1] != ",":
+            continue
+        return True
+    return False
+
+def _mask_entities(text: str, doc) -> str:
+    """Rebuilds the text once from entity offsets (doc must be nlp(text))."""
+    parts = []
+    last = 0
     for ent in doc.ents:
-        if ent.label_ in ["PERSON", "GPE", "ORG"]:
-            scrubbed_text = scrubbed_text.replace(ent.text, f"[{ent.label_}]")
-    return scrubbed_text
\ No newline at end of file
+        if ent.label_ in PII_LABELS:
+            parts.append(text[last:ent.start_char])
+            parts.append(f"[{ent.label_}]")
+            last = ent.end_char
+    parts.append(text[last:])
+    return "".join(parts)
+
+def scrub_pii(text: str) -> str:
+    text = _mask_patterns(text)
+    if not _has_entity_candidates(text):
+        metrics.incr("pii.fast_path")
+        return text
+    first_load = _nlp is None
+    doc = get_nlp()(text)
+    if first_load:
+        _record_load_stats(_load_stats)
+    return _mask_entities(text, doc)
+
+def _init_worker():
+    """Process-pool initializer: every worker loads the pipeline once at boot."""
+    get_nlp()
+
+def _scrub_batch(texts: List[str]) -> List[str]:
+    """
+    Worker-side entry point: runs one micro-batch through nlp.pipe.
+    Texts arrive already pattern-masked and pre-checked by the parent.
+    """
+    return [_mask_entities(text, doc) for text, doc in zip(texts, get_nlp().pipe(texts))]
+
+
+# ─── Off-loop Scrubbing Engine ────────────────────────────────
+class PIIScrubber:
+    """
+    Micro-batching front end for a process pool of spaCy workers.
+
+    Callers await scrub(); requests land on a bounded queue, a single batcher
+    task waits for a free worker, groups whatever arrives within
+    PII_BATCH_WAIT_MS (up to PII_MAX_BATCH texts) and ships the group to that
+    worker process. The event loop never runs NER itself.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.PII_WORKERS,
+        max_batch: int = settings.PII_MAX_BATCH,
+        batch_wait_ms: int = settings.PII_BATCH_WAIT_MS,
+        queue_size: int = settings.PII_QUEUE_SIZE,
+    ):
+        self.workers = workers or multiprocessing.cpu_count()
+        self.max_batch = max_batch
+        self.batch_wait_s = batch_wait_ms / 1000
+        self.queue_size = queue_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._inflight = set()
+
+    @property
+    def running(self) -> bool:
+        return self._batcher is not None and not self._batcher.done()
+
+    async def start(self):
+        if self.running:
+            return
+        # "spawn" keeps the workers independent of the event loop's threads
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._slots = asyncio.Semaphore(self.workers)
+        self._batcher = asyncio.create_task(self._run())
+        metrics.gauge("pii.queue_depth", lambda: self._queue.qsize() if self._queue else 0)
+        metrics.gauge("pii.inflight_batches", lambda: len(self._inflight))
+
+    async def warm_up(self) -> List[dict]:
+        """
+        Boots every worker process (each loads the model in its initializer)
+        and records the load time / memory they report, so the first request does
+        not pay for process spawn + model load.
+        """
+        if not self.running:
+            await self.start()
+        loop = asyncio.get_running_loop()
+        stats = await asyncio.gather(*[
+            loop.run_in_executor(self._executor, model_load_stats)
+            for _ in range(self.workers)
+        ])
+        for worker_stats in {s["pid"]: s for s in stats}.values():
+            _record_load_stats(worker_stats)
+        return stats
+
+    async def close(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+            self._batcher = None
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def scrub(self, text: str) -> str:
+        # Regex masking + NER pre-check run inline: they are microseconds, and
+        # most instructions ("clean my desk") never need a worker at all
+        text = _mask_patterns(text)
+        if not _has_entity_candidates(text):
+            metrics.incr("pii.fast_path")
+            return text
+
+        if not self.running:
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        t_start = time.perf_counter()
+        # Bounded queue: when full, callers wait here (backpressure)
+        await self._queue.put((text, future))
+        try:
+            return await future
+        finally:
+            metrics.incr("pii.requests")
+            metrics.observe("pii.latency_ms", (time.perf_counter() - t_start) * 1000)
+
+    async def _run(self):
+        while True:
+            # Wait for a free worker first, so requests keep piling into the
+            # next batch while every worker is busy
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            if self.batch_wait_s and len(batch) < self.max_batch:
+                await asyncio.sleep(self.batch_wait_s)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            task = asyncio.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch):
+        loop = asyncio.get_running_loop()
+        texts = [text for text, _ in batch]
+        try:
+            with metrics.timer("pii.batch_ms"):
+                results = await loop.run_in_executor(self._executor, _scrub_batch, texts)
+            metrics.incr("pii.batches")
+            metrics.observe("pii.batch_size", len(batch))
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            metrics.incr("pii.errors")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
+
+
+pii_scrubber = PIIScrubber()
+
+async def scrub_pii_async(text: str) -> str:
+    """Async, off-loop equivalent of scrub_pii()."""
+    return await pii_scrubber.scrub(text)
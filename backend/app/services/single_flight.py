@@ -0,0 +1,39 @@
+from typing import AsyncIterator, Callable, Dict, Tuple
+
+from app.core.metrics import metrics
+from app.services.broadcast import Broadcast
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight LLM generations.
+
+    The first caller for a key (the leader) starts the upstream stream in its
+    own task; every concurrent caller with the same key attaches to it and
+    receives the full text from the first chunk on, however late it joined.
+    The upstream task is independent of any one subscriber, so a leader's
+    client disconnecting does not cut off the followers.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, Broadcast] = {}
+        metrics.gauge("single_flight.inflight", lambda: len(self._flights))
+
+    def subscribe(
+        self, key: str, start: Callable[[], AsyncIterator[str]]
+    ) -> Tuple[AsyncIterator[str], bool]:
+        """Returns (text iterator, is_leader). start() is only called by the leader."""
+        flight = self._flights.get(key)
+        is_leader = flight is None
+        if is_leader:
+            flight = Broadcast()
+            self._flights[key] = flight
+            # New requests after the end start a fresh generation (or hit the cache)
+            flight.start(start(), on_done=lambda: self._flights.pop(key, None))
+            metrics.incr("single_flight.leaders")
+        else:
+            metrics.incr("single_flight.coalesced")
+        return flight.follow(), is_leader
+
+
+llm_flights = SingleFlight()
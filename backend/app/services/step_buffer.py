@@ -0,0 +1,104 @@
+import time
+from sqlalchemy import insert, update
+from app.core.config import settings
+from app.core.security import encrypt_data
+from app.db.session import AsyncSessionLocal, mark_task_write, mark_user_write
+from app.models.task import MicroWinModel, Task
+
+
+class StepWriteBuffer:
+    """
+    Write-behind buffer for a single decomposition stream.
+
+    Steps are handed to the client as soon as they are parsed, but persisted
+    here in batches: the pending steps go out in one transaction (a single
+    multi-row INSERT) when the size/time threshold is hit, and once more when
+    the stream ends, errors or the client disconnects. The title is flushed by
+    the stream as soon as it arrives, since the sidebar reloads on it.
+    """
+
+    def __init__(
+        self,
+        task_id: int,
+        user_id: int = None,
+        max_steps: int = settings.STREAM_FLUSH_MAX_STEPS,
+        max_delay_ms: int = settings.STREAM_FLUSH_MAX_DELAY_MS,
+    ):
+        self.task_id = task_id
+        self.user_id = user_id
+        self.max_steps = max_steps
+        self.max_delay_s = max_delay_ms / 1000
+        self._title = None
+        self._steps = []
+        self._finished = False
+        self._first_pending_at = None
+
+    def set_title(self, title: str):
+        self._title = title
+        self._mark_pending()
+
+    def finish(self):
+        """Record the end of the stream with the next flush."""
+        self._finished = True
+        self._mark_pending()
+
+    def add_step(self, step_order: int, action_text: str):
+        # Encrypting for Privacy-First Cloud storage
+        self._steps.append({
+            "task_id": self.task_id,
+            "encrypted_action": encrypt_data(action_text),
+            "is_completed": False,
+            "step_order": step_order,
+        })
+        self._mark_pending()
+
+    def _mark_pending(self):
+        if self._first_pending_at is None:
+            self._first_pending_at = time.perf_counter()
+
+    @property
+    def pending(self) -> bool:
+        return self._first_pending_at is not None
+
+    def should_flush(self) -> bool:
+        if not self.pending:
+            return False
+        if len(self._steps) >= self.max_steps:
+            return True
+        return time.perf_counter() - self._first_pending_at >= self.max_delay_s
+
+    async def flush(self) -> dict:
+        """
+        Persist everything pending in one short-lived session.
+        Returns {step_order: micro_win_id} for the steps written.
+        """
+        if not self.pending:
+            return {}
+
+        title, steps, finished = self._title, self._steps, self._finished
+        self._title, self._steps, self._finished, self._first_pending_at = None, [], False, None
+
+        persisted = {}
+        async with AsyncSessionLocal() as db:
+            # Title, step counter and end marker go out in a single UPDATE
+            task_values = {}
+            if title is not None:
+                task_values["title"] = title
+            if finished:
+                task_values["stream_finished"] = True
+            if steps:
+                task_values["total_steps"] = Task.total_steps + len(steps)
+            await db.execute(
+                update(Task).where(Task.id == self.task_id).values(**task_values)
+            )
+            if steps:
+                result = await db.execute(
+                    insert(MicroWinModel).returning(MicroWinModel.id, MicroWinModel.step_order),
+                    steps,
+                )
+                persisted = {row.step_order: row.id for row in result}
+            await db.commit()
+        # The sidebar (title) and task details read these rows right away
+        mark_task_write(self.task_id)
+        mark_user_write(self.user_id)
+        return persisted
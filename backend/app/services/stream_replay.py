@@ -0,0 +1,99 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.broadcast import Broadcast
+
+
+class StreamReplay:
+    """
+    Runs decomposition streams independently of the HTTP response that
+    started them and keeps their events for replay.
+
+    Generation happens in a background task, so a client that drops mid-stream
+    does not cut it off (and the steps are still persisted). Any number of
+    responses can subscribe to a task's events from a given event id - the
+    original request, a reconnect with Last-Event-ID, or an idempotent retry.
+    Each stream is a Broadcast of SSE payloads; event id = index + 1.
+    Finished streams are retained for STREAM_REPLAY_RETAIN_SECONDS.
+    The buffer is per worker process; see the DB fallback in the tasks router.
+    """
+
+    def __init__(
+        self,
+        max_streams: int = settings.STREAM_REPLAY_MAX_TASKS,
+        retain_seconds: int = settings.STREAM_REPLAY_RETAIN_SECONDS,
+        heartbeat_seconds: float = settings.STREAM_HEARTBEAT_SECONDS,
+    ):
+        self.max_streams = max_streams
+        self.retain_seconds = retain_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self._streams: "OrderedDict[int, Broadcast]" = OrderedDict()
+        metrics.gauge("stream_replay.tasks", lambda: len(self._streams))
+        metrics.gauge("stream_replay.generating", lambda: sum(not s.done for s in self._streams.values()))
+
+    def start(self, task_id: int, events: AsyncIterator[str]) -> Broadcast:
+        """Start generating a task's events in the background."""
+        self._evict()
+        stream = Broadcast().start(events)
+        self._streams[task_id] = stream
+        return stream
+
+    def get(self, task_id: int) -> Optional[Broadcast]:
+        stream = self._streams.get(task_id)
+        if stream is not None and stream.done and stream.finished_at + self.retain_seconds < time.monotonic():
+            del self._streams[task_id]
+            return None
+        return stream
+
+    async def subscribe(self, stream: Broadcast, after: int = 0):
+        """
+        SSE text for every event with id > after, live until the stream ends.
+        Sends a comment line whenever nothing happened for heartbeat_seconds
+        so proxies keep slow streams open.
+        """
+        position = max(after, 0)
+        yield f"retry: {settings.STREAM_RETRY_MS}\n\n"
+        while True:
+            available, finished = await stream.wait(position, timeout=self.heartbeat_seconds)
+            if not available and not finished:
+                yield ": heartbeat\n\n"
+                continue
+            for payload in available:
+                position += 1
+                yield f"id: {position}\n{payload}"
+            if finished and position >= len(stream.items):
+                return
+
+    async def replay(self, events: AsyncIterator[str], after: int = 0):
+        """SSE text for a one-shot event source, numbered to continue after `after`."""
+        position = max(after, 0)
+        yield f"retry: {settings.STREAM_RETRY_MS}\n\n"
+        async for payload in events:
+            position += 1
+            yield f"id: {position}\n{payload}"
+
+    def _evict(self):
+        """Drop expired finished streams, then the oldest finished ones over the cap."""
+        now = time.monotonic()
+        for task_id, stream in list(self._streams.items()):
+            if stream.done and stream.finished_at + self.retain_seconds < now:
+                del self._streams[task_id]
+        for task_id, stream in list(self._streams.items()):
+            if len(self._streams) < self.max_streams:
+                break
+            if stream.done:
+                del self._streams[task_id]
+
+    async def close(self):
+        """Cancel generations still running at shutdown (their final flush is shielded)."""
+        pumps = [s.task for s in self._streams.values() if not s.done]
+        for pump in pumps:
+            pump.cancel()
+        await asyncio.gather(*pumps, return_exceptions=True)
+
+
+stream_replay = StreamReplay()
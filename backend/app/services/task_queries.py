@@ -0,0 +1,90 @@
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import decrypt_rows
+from app.models.task import MicroWinModel, Task
+
+
+async def fetch_task_rows(db: AsyncSession, task_id=None, latest_for_user: Optional[int] = None) -> list:
+    """
+    A task and its steps in step order, as one outer-joined SELECT.
+    Pass task_id, or latest_for_user to get that user's newest task.
+    Returns [] when there is no such task; a task without steps is one row
+    whose step columns are None.
+    """
+    if latest_for_user is not None:
+        task_id = (
+            select(func.max(Task.id)).where(Task.user_id == latest_for_user).scalar_subquery()
+        )
+    return (await db.execute(
+        select(
+            Task.id, Task.title, Task.encrypted_goal, Task.is_completed, Task.stream_finished,
+            MicroWinModel.id.label("step_id"),
+            MicroWinModel.encrypted_action,
+            MicroWinModel.is_completed.label("step_completed"),
+            MicroWinModel.step_order,
+        )
+        .outerjoin(MicroWinModel, MicroWinModel.task_id == Task.id)
+        .where(Task.id == task_id)
+        .order_by(MicroWinModel.step_order, MicroWinModel.id)
+    )).all()
+
+
+def task_rows_version(rows: list) -> tuple:
+    """Everything in a task-detail response that can change, for ETags."""
+    task = rows[0]
+    return (
+        task.id, task.title, task.is_completed,
+        [(r.step_id, r.step_completed, r.step_order) for r in rows if r.step_id is not None],
+    )
+
+
+async def build_task_detail(rows: list) -> Optional[dict]:
+    """
+    The decrypted task-detail payload ({id, title, goal, steps}) for the rows
+    of fetch_task_rows. None if anything fails to decrypt.
+    """
+    task = rows[0]
+    steps = [r for r in rows if r.step_id is not None]
+
+    # Decrypt goal + every step in one off-loop batch (cached plaintext first)
+    goal, *actions = await decrypt_rows(
+        [("task", task.id, task.encrypted_goal)]
+        + [("micro_win", s.step_id, s.encrypted_action) for s in steps]
+    )
+    if goal is None or None in actions:
+        return None
+
+    return {
+        "id": task.id,
+        "title": task.title,
+        "goal": goal,
+        "steps": [
+            {
+                "id": s.step_id,
+                "action": action, # Decrypted for UI
+                "is_completed": s.step_completed,
+                "order": s.step_order
+            } for s, action in zip(steps, actions)
+        ]
+    }
+
+
+async def fetch_sidebar_progress(db: AsyncSession, user_id: int) -> list:
+    """Sidebar entries with per-task progress, newest first, in one query."""
+    result = await db.execute(
+        select(Task.id, Task.title, Task.is_completed, Task.completed_steps, Task.total_steps)
+        .where(Task.user_id == user_id)
+        .order_by(Task.id.desc())
+    )
+    return [
+        {
+            "id": t.id,
+            "title": t.title or "Untitled Task",
+            "is_completed": bool(t.is_completed),
+            "completed_steps": t.completed_steps or 0,
+            "total_steps": t.total_steps or 0,
+        } for t in result.all()
+    ]
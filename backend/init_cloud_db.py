@@ -1,5 +1,7 @@
 import asyncio
+from sqlalchemy import text
 from app.db.session import engine, Base
+from app.db.migrations import run_migrations
 # Import all models to ensure they are registered with Base.metadata
 from app.models.task import Task, MicroWinModel
 from app.models.user import User 
@@ -7,13 +9,13 @@ from app.models.user import User
 async def init_db():
     async with engine.begin() as conn:
         print("Dropping existing tables...")
-        # WARNING: This deletes existing data. Necessary for schema updates.
+        # WARNING: This deletes existing data. Only for resetting a dev/cloud database.
         await conn.run_sync(Base.metadata.drop_all)
-        
-        print("Creating new tables with updated schema...")
-        await conn.run_sync(Base.metadata.create_all)
-        
+        await conn.execute(text("DROP TABLE IF EXISTS schema_version"))
+
+    print("Recreating schema from migrations...")
+    await run_migrations(engine)
     print("Database synchronization complete.")
 
 if __name__ == "__main__":
-    asyncio.run(init_db())
\ No newline at end of file
+    asyncio.run(init_db())
@@ -6,20 +6,34 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.tasks import router as tasks_router
 from app.api.v1.user import router as users_router
 from app.api.v1.auth import router as auth_router
+from app.api.v1.metrics import router as metrics_router
 from app.core.config import settings
 
 # IMPORT MODELS HERE TO REGISTER THEM WITH SQLALCHEMY
 from app.models.task import Task
 from app.models.user import User
 
-from app.db.session import engine, Base
+from app.db.session import engine
+from app.db.migrations import pending_migrations
+from app.services.pii_services import pii_scrubber
+from app.services.stream_replay import stream_replay
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Auto-create tables on startup (safe: create_all is a no-op if tables exist)
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # Schema changes are applied by `python migrate.py` before the server
+    # starts (see Dockerfile); here we only warn if the database is behind.
+    try:
+        pending = await pending_migrations(engine)
+        if pending:
+            print(f"⚠️  {len(pending)} pending migration(s), run: python migrate.py")
+    except Exception as e:
+        print(f"Could not check schema version: {e}")
+    await pii_scrubber.start()
+    if settings.PII_WARM_UP:
+        await pii_scrubber.warm_up()
     yield
+    await stream_replay.close()
+    await pii_scrubber.close()
 
 app = FastAPI(title="MicroWin API", lifespan=lifespan)
 
@@ -40,6 +54,7 @@ app.add_middleware(
 app.include_router(auth_router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(tasks_router, prefix="/api/v1/tasks", tags=["tasks"])
 app.include_router(users_router, prefix="/api/v1/users", tags=["users"])
+app.include_router(metrics_router, prefix="/api/v1/metrics", tags=["metrics"])
 
 @app.get("/")
 def read_root():
@@ -48,16 +63,24 @@ def read_root():
 # ─── Serve Frontend in Production (Docker) ────────────────
 STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
 if os.path.isdir(STATIC_DIR):
-    from fastapi.staticfiles import StaticFiles
-    from fastapi.responses import FileResponse
-
-    @app.get("/assets/{rest_of_path:path}")
-    async def serve_assets(rest_of_path: str):
-        return FileResponse(os.path.join(STATIC_DIR, "assets", rest_of_path))
-
-    @app.get("/{full_path:path}")
-    async def serve_spa(full_path: str):
-        file_path = os.path.join(STATIC_DIR, full_path)
-        if os.path.isfile(file_path):
-            return FileResponse(file_path)
-        return FileResponse(os.path.join(STATIC_DIR, "index.html"))
\ No newline at end of file
+    from fastapi import HTTPException, Request
+    from app.core.static_files import StaticSite, is_safe_path
+
+    # Manifest, index.html and compressed variants are built once, here
+    static_site = StaticSite(STATIC_DIR)
+
+    @app.api_route("/{full_path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+    async def serve_spa(full_path: str, request: Request):
+        if not is_safe_path(full_path):
+            raise HTTPException(status_code=400, detail="Invalid path")
+        head = request.method == "HEAD"
+
+        asset = static_site.lookup(full_path)
+        if asset is not None:
+            return static_site.respond(asset, request.headers, head)
+
+        # Missing bundle files and unknown API routes are real 404s;
+        # everything else is a client-side route
+        if full_path.startswith(("assets/", "api/")) or static_site.index is None:
+            raise HTTPException(status_code=404, detail="Not Found")
+        return static_site.respond(static_site.index, request.headers, head)
@@ -0,0 +1,28 @@
+"""
+Apply pending database migrations (see app/db/migrations.py).
+Run before starting the API: python migrate.py
+Show what would run:        python migrate.py --status
+"""
+import asyncio
+import sys
+
+from app.db.migrations import LATEST_VERSION, pending_migrations, run_migrations
+from app.db.session import engine
+
+
+async def main():
+    if "--status" in sys.argv:
+        pending = await pending_migrations(engine)
+        print(f"Latest schema version: {LATEST_VERSION}")
+        for migration in pending:
+            print(f"  pending: {migration.version:04d} {migration.name}")
+        if not pending:
+            print("✅ Database is up to date.")
+    else:
+        ran = await run_migrations(engine)
+        print(f"✅ Migrations complete ({ran} applied, schema version {LATEST_VERSION}).")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -9,9 +9,9 @@ import {
 import {
     apiLogin,
     apiSignup,
-    apiGetMe,
+    apiGetBootstrap,
     apiVerifyGoogleToken,
-
+    type BootstrapData,
     type UserData,
 } from "@/lib/api";
 
@@ -19,6 +19,8 @@ interface AuthContextType {
     user: UserData | null;
     token: string | null;
     isLoading: boolean;
+    // Sidebar + newest task fetched with the restored session, for the Dashboard
+    bootstrap: BootstrapData | null;
     login: (email: string, password: string) => Promise<void>;
     signup: (email: string, password: string, fullName?: string) => Promise<void>;
     handleOAuthCallback: (accessToken: string) => Promise<void>;
@@ -34,6 +36,7 @@ export function AuthProvider({ children }: { children: ReactNode }) {
         () => localStorage.getItem("token")
     );
     const [isLoading, setIsLoading] = useState(true);
+    const [bootstrap, setBootstrap] = useState<BootstrapData | null>(null);
 
     // Persist token
     const saveToken = useCallback((newToken: string) => {
@@ -49,8 +52,10 @@ export function AuthProvider({ children }: { children: ReactNode }) {
                 return;
             }
             try {
-                const userData = await apiGetMe();
-                setUser(userData);
+                // Profile, sidebar and newest task in one request
+                const data = await apiGetBootstrap();
+                setBootstrap(data);
+                setUser(data.user);
             } catch {
                 // Token expired or invalid
                 localStorage.removeItem("token");
@@ -91,6 +96,7 @@ export function AuthProvider({ children }: { children: ReactNode }) {
         localStorage.removeItem("condition");
         setToken(null);
         setUser(null);
+        setBootstrap(null);
     };
 
     return (
@@ -99,6 +105,7 @@ export function AuthProvider({ children }: { children: ReactNode }) {
                 user,
                 token,
                 isLoading,
+                bootstrap,
                 login,
                 signup,
                 handleOAuthCallback,
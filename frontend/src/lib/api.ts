@@ -124,9 +124,37 @@ export async function apiGetUserTasks(userId: number): Promise<SidebarTask[]> {
     return request<SidebarTask[]>(`/tasks/user/${userId}`);
 }
 
+export interface StreamSummary {
+    id: number;
+    title: string | null;
+    steps: { id: number; action: string; is_completed: boolean; step_order: number }[];
+}
+
+// The JSON payload of one "data:" line of a decomposition stream
+export interface DecomposeStreamEvent {
+    task_id?: number;
+    latency_ms?: number;
+    current_step?: { step_id: number; action: string };
+    sidebar_title?: string;
+    task_summary?: StreamSummary;
+    // Resumed from saved steps while the stream is still generating elsewhere
+    partial?: boolean;
+    partial_summary?: StreamSummary;
+    error?: string;
+}
+
+// One per decomposition the user starts; reused for every retry of it
+export function newIdempotencyKey(): string {
+    return crypto.randomUUID?.() ?? `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+}
+
+// Pass the same idempotencyKey (and the last seen event id) when retrying a
+// dropped stream: the server resumes the original task instead of starting over
 export async function apiDecomposeStream(
     instruction: string,
-    userId: number
+    userId: number,
+    idempotencyKey?: string,
+    lastEventId?: string
 ): Promise<Response> {
     const res = await fetch(
         `${API_BASE}/tasks/decompose/stream?user_id=${userId}`,
@@ -135,6 +163,8 @@ export async function apiDecomposeStream(
             headers: {
                 "Content-Type": "application/json",
                 ...authHeaders(),
+                ...(idempotencyKey ? { "Idempotency-Key": idempotencyKey } : {}),
+                ...(lastEventId ? { "Last-Event-ID": lastEventId } : {}),
             },
             body: JSON.stringify({ instruction }),
         }
@@ -146,6 +176,20 @@ export async function apiDecomposeStream(
     return res;
 }
 
+export async function apiResumeStream(taskId: number, lastEventId?: string): Promise<Response> {
+    const res = await fetch(`${API_BASE}/tasks/${taskId}/stream`, {
+        headers: {
+            ...authHeaders(),
+            ...(lastEventId ? { "Last-Event-ID": lastEventId } : {}),
+        },
+    });
+    if (!res.ok) {
+        const body = await res.json().catch(() => ({}));
+        throw new Error(body.detail || "Stream resume failed");
+    }
+    return res;
+}
+
 export interface TaskStep {
     id: number;
     action: string;
@@ -164,6 +208,23 @@ export async function apiGetTaskDetails(taskId: number): Promise<TaskDetails> {
     return request<TaskDetails>(`/tasks/${taskId}`);
 }
 
+export interface SidebarTaskProgress extends SidebarTask {
+    is_completed: boolean;
+    completed_steps: number;
+    total_steps: number;
+}
+
+export interface BootstrapData {
+    user: UserData;
+    tasks: SidebarTaskProgress[];
+    latest_task: TaskDetails | null;
+}
+
+// Profile, sidebar (with progress) and the newest task in one request
+export async function apiGetBootstrap(includeLatest = true): Promise<BootstrapData> {
+    return request<BootstrapData>(`/auth/me/bootstrap?include_latest=${includeLatest}`);
+}
+
 export async function apiUpdateProfile(userId: number, data: { full_name?: string }): Promise<UserData> {
     return request<UserData>(`/users/profile/${userId}`, {
         method: "PATCH",
@@ -191,3 +252,20 @@ export async function apiUpdateStepStatus(stepId: number, isCompleted: boolean):
         method: "PATCH",
     });
 }
+
+export interface BatchStepUpdateResponse {
+    updated: number[];
+    tasks: { id: number; is_completed: boolean; completed_steps: number; total_steps: number }[];
+    tasks_completed: number;
+    streak_count: number;
+    total_completed: number;
+}
+
+export async function apiUpdateStepStatuses(
+    updates: { step_id: number; is_completed: boolean }[]
+): Promise<BatchStepUpdateResponse> {
+    return request<BatchStepUpdateResponse>(`/tasks/microwins`, {
+        method: "PATCH",
+        body: JSON.stringify({ updates }),
+    });
+}
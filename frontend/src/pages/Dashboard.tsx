@@ -29,12 +29,16 @@ import { WelcomeModal } from "@/components/WelcomeModal"
 import { useAuth } from "@/contexts/AuthContext"
 import {
   apiDecomposeStream,
+  apiGetBootstrap,
+  newIdempotencyKey,
   apiGetUserTasks,
   apiGetTaskDetails,
   apiDeleteTask,
   apiUpdateStepStatus,
   apiUpdateProfile,
+  type DecomposeStreamEvent,
   type SidebarTask,
+  type TaskDetails,
   type TaskStep,
 } from "@/lib/api"
 import { fireConfetti } from "@/lib/confetti"
@@ -59,6 +63,10 @@ const SUCCESS_MESSAGES = [
 
 type MascotMood = "idle" | "thinking" | "happy" | "celebrating"
 
+// Reconnect attempts for a dropped decomposition stream (linear backoff)
+const STREAM_RETRIES = 3
+const STREAM_RETRY_DELAY_MS = 1000
+
 export default function Dashboard() {
   const [messages, setMessages] = useState<Message[]>([])
   const [input, setInput] = useState("")
@@ -84,7 +92,7 @@ export default function Dashboard() {
   const messagesEndRef = useRef<HTMLDivElement>(null)
   const inputRef = useRef<HTMLInputElement>(null)
   const navigate = useNavigate()
-  const { user, logout, updateUser } = useAuth()
+  const { user, bootstrap, logout, updateUser } = useAuth()
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" })
@@ -94,14 +102,26 @@ export default function Dashboard() {
     scrollToBottom()
   }, [messages, isTyping, showReward])
 
+  // First paint: sidebar and the newest task come from one bootstrap request
+  // (already made by AuthContext when the session was restored)
   useEffect(() => {
-    if (user?.id) {
-      apiGetUserTasks(user.id).then(setSidebarTasks).catch(() => { })
-
-      // Check if user has a name
-      if (!user.full_name) {
-        setIsWelcomeOpen(true)
+    if (!user?.id) return
+    const load = bootstrap && bootstrap.user.id === user.id ? Promise.resolve(bootstrap) : apiGetBootstrap()
+    load.then(data => {
+      setSidebarTasks(data.tasks)
+      // Pick an unfinished quest back up where it was left
+      const latest = data.latest_task
+      if (latest && latest.steps.some(s => !s.is_completed)) {
+        showTask(latest)
       }
+    }).catch(() => { })
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [user?.id])
+
+  useEffect(() => {
+    // Check if user has a name
+    if (user?.id && !user.full_name) {
+      setIsWelcomeOpen(true)
     }
   }, [user?.id, user?.full_name])
 
@@ -205,43 +225,92 @@ export default function Dashboard() {
     setInput("")
     setIsTyping(true)
 
+    // A dropped connection (mobile network switch, tab in background) is
+    // retried with the same Idempotency-Key and the last event id seen, so the
+    // server resumes the original task instead of creating another one
+    const idempotencyKey = newIdempotencyKey()
+    let lastEventId: string | undefined
+    let finished = false
+    const collectedSteps: TaskStep[] = []
+    let stepCounter = 1
+
+    const handleEvent = (data: DecomposeStreamEvent) => {
+      const summary = data.task_summary ?? data.partial_summary
+      if (data.task_id !== undefined) {
+        // First event of a stream, also when a retry replays it from the start
+        collectedSteps.length = 0
+        stepCounter = 1
+      } else if (data.latency_ms !== undefined) {
+        setLatencyMs(data.latency_ms)
+      } else if (data.current_step?.action) {
+        collectedSteps.push({
+          id: data.current_step.step_id || stepCounter,
+          action: data.current_step.action,
+          is_completed: false,
+          order: stepCounter
+        })
+        stepCounter++
+      } else if (data.sidebar_title) {
+        apiGetUserTasks(user.id).then(setSidebarTasks).catch(() => { })
+      } else if (summary) {
+        // Final event carries the persisted step ids, no follow-up fetch needed.
+        // A partial summary (the stream is still generating elsewhere) is
+        // shown as-is and followed by another retry.
+        const summarySteps: TaskStep[] = summary.steps.map(s => ({
+          id: s.id,
+          action: s.action,
+          is_completed: s.is_completed,
+          order: s.step_order
+        }))
+        collectedSteps.splice(0, collectedSteps.length, ...summarySteps)
+        stepCounter = summarySteps.length + 1
+        setActiveTaskId(summary.id)
+        finished = !data.partial
+        // Snapshot ids don't line up with the live stream's; start the next
+        // attempt from the beginning
+        if (data.partial) lastEventId = undefined
+      } else if (data.error) {
+        finished = true
+      }
+    }
+
     try {
-      const res = await apiDecomposeStream(userMessage, user.id)
-      const reader = res.body?.getReader()
-      if (!reader) throw new Error("No stream reader")
-
-      const decoder = new TextDecoder()
-      const collectedSteps: TaskStep[] = []
-      let stepCounter = 1
-
-      while (true) {
-        const { done, value } = await reader.read()
-        if (done) break
-
-        const chunk = decoder.decode(value, { stream: true })
-        const lines = chunk.split("\n")
-
-        for (const line of lines) {
-          if (line.startsWith("data: ")) {
-            try {
-              const data = JSON.parse(line.slice(6))
-              if (data.latency_ms !== undefined) {
-                setLatencyMs(data.latency_ms)
-              } else if (data.current_step?.action) {
-                collectedSteps.push({
-                  id: data.current_step.step_id || stepCounter,
-                  action: data.current_step.action,
-                  is_completed: false,
-                  order: stepCounter
-                })
-                stepCounter++
-              } else if (data.sidebar_title) {
-                apiGetUserTasks(user.id).then(setSidebarTasks).catch(() => { })
+      for (let attempt = 0; !finished && attempt <= STREAM_RETRIES; attempt++) {
+        if (attempt > 0) {
+          await new Promise(resolve => setTimeout(resolve, STREAM_RETRY_DELAY_MS * attempt))
+        }
+        try {
+          const res = await apiDecomposeStream(userMessage, user.id, idempotencyKey, lastEventId)
+          const reader = res.body?.getReader()
+          if (!reader) throw new Error("No stream reader")
+
+          const decoder = new TextDecoder()
+          let pending = ""
+          while (true) {
+            const { done, value } = await reader.read()
+            if (done) break
+
+            // Lines can be split across chunks; keep the unfinished tail
+            pending += decoder.decode(value, { stream: true })
+            const lines = pending.split("\n")
+            pending = lines.pop() ?? ""
+
+            for (const line of lines) {
+              if (line.startsWith("id: ")) {
+                lastEventId = line.slice(4)
+              } else if (line.startsWith("data: ")) {
+                try {
+                  handleEvent(JSON.parse(line.slice(6)))
+                } catch {
+                  // skip
+                }
               }
-            } catch {
-              // skip
             }
           }
+        } catch (err) {
+          // Only network failures are retried; HTTP errors (rate limit,
+          // validation) are final
+          if (!(err instanceof TypeError)) throw err
         }
       }
 
@@ -275,25 +344,26 @@ export default function Dashboard() {
     }
   }
 
-  const loadTask = async (taskId: number) => {
-    try {
-      setMascotMood("thinking")
-      const task = await apiGetTaskDetails(taskId)
-      setActiveTaskId(taskId)
-      setMessages([{ role: "user", content: task.goal }])
+  const showTask = (task: TaskDetails) => {
+    setActiveTaskId(task.id)
+    setMessages([
+      { role: "user", content: task.goal },
+      { role: "bot", content: `Resuming Quest: ${task.title || "Untitled"}` },
+    ])
 
-      setCurrentQuestSteps(task.steps)
+    setCurrentQuestSteps(task.steps)
 
-      const firstUndone = task.steps.findIndex(s => !s.is_completed)
-      const isComplete = firstUndone === -1 && task.steps.length > 0;
+    const firstUndone = task.steps.findIndex(s => !s.is_completed)
+    const isComplete = firstUndone === -1 && task.steps.length > 0;
 
-      setActiveStepIndex(firstUndone === -1 ? task.steps.length : firstUndone)
-      setMascotMood(isComplete ? "celebrating" : "idle")
+    setActiveStepIndex(firstUndone === -1 ? task.steps.length : firstUndone)
+    setMascotMood(isComplete ? "celebrating" : "idle")
+  }
 
-      setMessages(prev => [
-        ...prev,
-        { role: "bot", content: `Resuming Quest: ${task.title || "Untitled"}` }
-      ])
+  const loadTask = async (taskId: number) => {
+    try {
+      setMascotMood("thinking")
+      showTask(await apiGetTaskDetails(taskId))
     } catch {
       setMascotMood("idle")
     }
@@ -7,6 +7,8 @@ Run this after starting the FastAPI server with: uvicorn backend.main:app --relo
 import requests
 import json
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 BASE_URL = "http://localhost:8000"
 
@@ -110,6 +112,457 @@ def test_validation():
     else:
         print(f"❌ Expected 422, got {response.status_code}")
 
+def _signup_test_user(prefix):
+    """Create a throwaway user and return (user id, auth headers)."""
+    email = f"{prefix}-{int(time.time() * 1000)}@example.com"
+    response = requests.post(
+        f"{BASE_URL}/api/v1/auth/signup",
+        json={"email": email, "password": "microwin-test-pw"},
+        timeout=30
+    )
+    response.raise_for_status()
+    body = response.json()
+    return body["user"]["id"], {"Authorization": f"Bearer {body['access_token']}"}
+
+def test_concurrent_streams_small_pool(n_streams=20):
+    """
+    Open more concurrent decomposition streams than the DB pool can hold
+    (default pool_size=5 + max_overflow=10 = 15 connections).
+    Streams only borrow a connection for each write, so all of them must
+    finish and /health must stay responsive while they are open.
+    """
+    print("\n" + "="*50)
+    print(f"Testing {n_streams} concurrent streams against a smaller DB pool")
+    print("="*50)
+
+    # Spread over several users so the per-user rate limit (burst 10) isn't hit
+    user_ids = [_signup_test_user("pool")[0] for _ in range((n_streams + 4) // 5)]
+
+    def run_stream(i):
+        response = requests.post(
+            f"{BASE_URL}/api/v1/tasks/decompose/stream",
+            params={"user_id": user_ids[i % len(user_ids)]},
+            json={"instruction": f"Tidy up shelf number {i} in the garage"},
+            stream=True,
+            timeout=120
+        )
+        events = [line for line in response.iter_lines() if line]
+        return response.status_code, events
+
+    with ThreadPoolExecutor(max_workers=n_streams) as pool:
+        futures = [pool.submit(run_stream, i) for i in range(n_streams)]
+
+        # The event loop and the pool must stay free while streams are open
+        t0 = time.perf_counter()
+        health = requests.get(f"{BASE_URL}/api/v1/tasks/health", timeout=10)
+        health_ms = round((time.perf_counter() - t0) * 1000)
+        print(f"/health during streams: {health.status_code} in {health_ms}ms")
+
+        results = [f.result() for f in futures]
+
+    failed = [r for r in results if r[0] != 200 or not any(b"total_latency_ms" in e for e in r[1])]
+    if failed or health.status_code != 200:
+        print(f"❌ {len(failed)} of {n_streams} streams did not complete")
+        return False
+
+    print(f"✅ All {n_streams} streams completed")
+    return True
+
+def _create_task(user_id, instruction):
+    """Run one decomposition stream and return its task_summary (None if missing)."""
+    response = requests.post(
+        f"{BASE_URL}/api/v1/tasks/decompose/stream",
+        params={"user_id": user_id},
+        json={"instruction": instruction},
+        stream=True,
+        timeout=120
+    )
+    for line in response.iter_lines():
+        if line and b"task_summary" in line:
+            return json.loads(line.decode("utf-8")[6:])["task_summary"]
+    return None
+
+def _complete_step(step_id):
+    return requests.patch(
+        f"{BASE_URL}/api/v1/tasks/microwins/{step_id}",
+        params={"is_completed": "true"},
+        timeout=30
+    ).json()
+
+def test_parallel_step_toggles(repeats=5):
+    """
+    Complete every step of one task from many threads at once, several times
+    over. The task must end up completed and the user's total_completed must
+    move by exactly one, no matter how the requests interleave.
+    """
+    print("\n" + "="*50)
+    print("Testing parallel micro-win completion")
+    print("="*50)
+
+    user_id, headers = _signup_test_user("toggle")
+    summary = _create_task(user_id, "Water all the plants on the balcony")
+    if summary is None:
+        print("❌ Stream finished without a task summary")
+        return False
+
+    step_ids = [step["id"] for step in summary["steps"]] * repeats
+    with ThreadPoolExecutor(max_workers=len(step_ids)) as pool:
+        results = list(pool.map(_complete_step, step_ids))
+
+    task = requests.get(f"{BASE_URL}/api/v1/tasks/{summary['id']}", timeout=30).json()
+    user = requests.get(f"{BASE_URL}/api/v1/auth/me", headers=headers, timeout=30).json()
+    print(f"total_completed: {user['total_completed']}, streak: {user['streak_count']}")
+
+    all_steps_done = all(step["is_completed"] for step in task["steps"])
+    if user["total_completed"] != 1 or not all_steps_done:
+        print("❌ Parallel toggles double-counted or lost the completion")
+        return False
+
+    # Toggles that found the task already done must still report the real
+    # streak/total (the dashboard copies them into the user whenever
+    # task_completed is true)
+    stale = [
+        r for r in results + [_complete_step(step_ids[0])]
+        if r.get("task_completed") and (r.get("total_completed"), r.get("streak_count")) != (1, 1)
+    ]
+    if stale:
+        print(f"❌ {len(stale)} responses reported task_completed with wrong streak/total: {stale[0]}")
+        return False
+
+    print(f"✅ {len(step_ids)} parallel toggles completed the task exactly once")
+    return True
+
+def test_concurrent_quest_completions(n_tasks=8):
+    """
+    Finish several quests for the same user at the same moment.
+    total_completed must equal the number of quests and the streak must be 1
+    (all on the same day) - no increment may be lost to a race.
+    """
+    print("\n" + "="*50)
+    print(f"Testing {n_tasks} concurrent quest completions for one user")
+    print("="*50)
+
+    user_id, headers = _signup_test_user("streak")
+    summaries = [_create_task(user_id, f"Sort drawer number {i} in the kitchen") for i in range(n_tasks)]
+    if any(s is None for s in summaries):
+        print("❌ A stream finished without a task summary")
+        return False
+
+    step_ids = [step["id"] for s in summaries for step in s["steps"]]
+    with ThreadPoolExecutor(max_workers=len(step_ids)) as pool:
+        results = list(pool.map(_complete_step, step_ids))
+
+    reported = sorted(r["total_completed"] for r in results if r.get("total_completed"))
+    user = requests.get(f"{BASE_URL}/api/v1/auth/me", headers=headers, timeout=30).json()
+    print(f"Reported totals: {reported}")
+    print(f"Final total_completed: {user['total_completed']}, streak: {user['streak_count']}")
+
+    if reported != list(range(1, n_tasks + 1)) or user["total_completed"] != n_tasks or user["streak_count"] != 1:
+        print("❌ Concurrent completions lost or duplicated an increment")
+        return False
+
+    print(f"✅ {n_tasks} concurrent completions counted exactly")
+    return True
+
+def test_batch_step_update():
+    """Mark every step of a task done in one request; the quest counts once."""
+    print("\n" + "="*50)
+    print("Testing batch micro-win update")
+    print("="*50)
+
+    user_id, headers = _signup_test_user("batch")
+    summary = _create_task(user_id, "Pack the bag for the gym tomorrow")
+    if summary is None:
+        print("❌ Stream finished without a task summary")
+        return False
+
+    response = requests.patch(
+        f"{BASE_URL}/api/v1/tasks/microwins",
+        json={"updates": [{"step_id": s["id"], "is_completed": True} for s in summary["steps"]]},
+        timeout=30
+    )
+    result = response.json()
+    print(f"Status: {response.status_code}, result: {json.dumps(result)}")
+
+    if response.status_code != 200 or result["tasks_completed"] != 1 or result["total_completed"] != 1:
+        print("❌ Batch update did not complete the task exactly once")
+        return False
+
+    print(f"✅ {len(result['updated'])} steps updated in one request")
+    return True
+
+def test_resume_stream():
+    """
+    Drop a decomposition stream after a few events, then retry with the same
+    Idempotency-Key and Last-Event-ID: the retry must attach to the same task
+    and deliver the rest of the stream, including the task summary.
+    """
+    print("\n" + "="*50)
+    print("Testing stream resume with Idempotency-Key / Last-Event-ID")
+    print("="*50)
+
+    user_id, _ = _signup_test_user("resume")
+    key = f"resume-{int(time.time() * 1000)}"
+    url = f"{BASE_URL}/api/v1/tasks/decompose/stream"
+    body = {"instruction": "Fold the laundry on the chair"}
+
+    response = requests.post(url, params={"user_id": user_id}, json=body,
+                             headers={"Idempotency-Key": key}, stream=True, timeout=120)
+    task_id = response.headers.get("X-Task-Id")
+    last_event_id = None
+    for line in response.iter_lines():
+        if line.startswith(b"id: "):
+            last_event_id = line[4:].decode()
+            if int(last_event_id) >= 2:
+                break
+    response.close()
+    print(f"Dropped task {task_id} after event {last_event_id}")
+
+    retry = requests.post(url, params={"user_id": user_id}, json=body,
+                          headers={"Idempotency-Key": key, "Last-Event-ID": last_event_id},
+                          stream=True, timeout=120)
+    events = [line for line in retry.iter_lines() if line]
+    ids = [int(line[4:]) for line in events if line.startswith(b"id: ")]
+    print(f"Retry task: {retry.headers.get('X-Task-Id')}, resumed at event {ids[0] if ids else None}")
+
+    if retry.headers.get("X-Task-Id") != task_id or not ids or ids[0] <= int(last_event_id) \
+            or not any(b"task_summary" in e for e in events):
+        print("❌ Retry did not resume the original stream")
+        return False
+
+    print("✅ Retry resumed the original task without starting over")
+    return True
+
+def test_pii_masking():
+    """
+    The goal sent to Gemini (echoed back as original_goal) must keep dates,
+    times, counts and ids, and lose phone numbers. Lowercase imperative goals
+    like "Clean my desk" must skip NER (pii.fast_path in /api/v1/metrics).
+    """
+    print("\n" + "="*50)
+    print("Testing PII pattern masking")
+    print("="*50)
+
+    user_id, _ = _signup_test_user("pii")
+    before = requests.get(f"{BASE_URL}/api/v1/metrics/", timeout=10).json()["counters"].get("pii.fast_path", 0)
+
+    cases = [
+        ("book flight 2025-03-04 14:00", "book flight 2025-03-04 14:00"),
+        ("dentist on 04.03.2025 14:00:30", "dentist on 04.03.2025 14:00:30"),
+        ("read pages 100 200 300", "read pages 100 200 300"),
+        ("plan budget between 2024 2025 2026", "plan budget between 2024 2025 2026"),
+        ("pay invoice 123456789", "pay invoice 123456789"),
+        ("call +1 (555) 123-4567 now", "call [PHONE] now"),
+        ("text 06 12 34 56 78 or mail me@example.com", "text [PHONE] or mail [EMAIL]"),
+    ]
+    instruction = "; ".join(raw for raw, _ in cases)
+    expected = "; ".join(masked for _, masked in cases)
+    summary = _create_task(user_id, instruction)
+    goal = summary["original_goal"] if summary else None
+    print(f"Sent:     {instruction}\nReceived: {goal}")
+    if goal != expected:
+        print(f"❌ Expected: {expected}")
+        return False
+
+    _create_task(user_id, "Clean my desk")
+    after = requests.get(f"{BASE_URL}/api/v1/metrics/", timeout=10).json()["counters"].get("pii.fast_path", 0)
+    if after - before != 2:
+        print(f"❌ pii.fast_path moved by {after - before}, expected 2")
+        return False
+
+    print("✅ Phone numbers masked, dates/counts kept, NER skipped for plain goals")
+    return True
+
+def _walk_pages(params):
+    """Follow next_cursor from the first page to the last; returns (ids, pages)."""
+    ids, pages, cursor = [], 0, None
+    while True:
+        response = requests.get(
+            f"{BASE_URL}/api/v1/tasks/page",
+            params={**params, **({"cursor": cursor} if cursor else {})},
+            timeout=30
+        )
+        response.raise_for_status()
+        page = response.json()
+        ids.extend(task["id"] for task in page["items"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids, pages
+
+def test_task_pagination(n_tasks=5, limit=2):
+    """
+    Page through one user's tasks with a small limit: every task must show
+    up exactly once, newest first, and the last page must have a null
+    next_cursor. is_completed filters both ways; a malformed cursor is a 400.
+    """
+    print("\n" + "="*50)
+    print(f"Testing keyset pagination ({n_tasks} tasks, limit={limit})")
+    print("="*50)
+
+    user_id, _ = _signup_test_user("page")
+    summaries = [_create_task(user_id, f"Organize bookshelf row {i}") for i in range(n_tasks)]
+    if None in summaries:
+        print("❌ Stream finished without a task summary")
+        return False
+    for step in summaries[0]["steps"]:
+        _complete_step(step["id"])
+
+    created = sorted((s["id"] for s in summaries), reverse=True)
+    ids, pages = _walk_pages({"user_id": user_id, "limit": limit})
+    print(f"Walked {pages} pages: {ids}")
+    if ids != created or pages != -(-n_tasks // limit):
+        print(f"❌ Expected {created} over {-(-n_tasks // limit)} pages")
+        return False
+
+    done_ids, _ = _walk_pages({"user_id": user_id, "limit": limit, "is_completed": "true"})
+    open_ids, _ = _walk_pages({"user_id": user_id, "limit": limit, "is_completed": "false"})
+    if done_ids != [summaries[0]["id"]] or sorted(open_ids + done_ids, reverse=True) != created:
+        print(f"❌ is_completed filter: done={done_ids}, open={open_ids}")
+        return False
+
+    bad = requests.get(f"{BASE_URL}/api/v1/tasks/page", params={"cursor": "not-a-cursor"}, timeout=30)
+    if bad.status_code != 400:
+        print(f"❌ Malformed cursor returned {bad.status_code}, expected 400")
+        return False
+
+    print("✅ Pages cover every task once; filters and cursor validation work")
+    return True
+
+def _revalidate(url, etag):
+    """Conditional GET with If-None-Match: etag; returns the response."""
+    return requests.get(url, headers={"If-None-Match": etag}, timeout=30)
+
+def test_etag_revalidation():
+    """
+    The sidebar and task detail endpoints send a strong ETag. Sending it back
+    as If-None-Match must give an empty 304 while nothing changed, and a 200
+    with a new ETag once the task list or a step does.
+    """
+    print("\n" + "="*50)
+    print("Testing ETag / 304 revalidation")
+    print("="*50)
+
+    user_id, _ = _signup_test_user("etag")
+    summary = _create_task(user_id, "Sort the laundry")
+    if summary is None:
+        print("❌ Stream finished without a task summary")
+        return False
+
+    urls = {
+        "sidebar": f"{BASE_URL}/api/v1/tasks/user/{user_id}",
+        "task": f"{BASE_URL}/api/v1/tasks/{summary['id']}",
+    }
+    etags = {}
+    for name, url in urls.items():
+        first = requests.get(url, timeout=30)
+        etags[name] = first.headers.get("ETag")
+        if first.status_code != 200 or not etags[name]:
+            print(f"❌ {name}: {first.status_code} without an ETag")
+            return False
+        again = _revalidate(url, etags[name])
+        print(f"{name}: ETag {etags[name]} -> {again.status_code}")
+        if again.status_code != 304 or again.content or again.headers.get("ETag") != etags[name]:
+            print(f"❌ {name}: unchanged resource answered {again.status_code} with {len(again.content)} bytes")
+            return False
+
+    # One change per resource: a step completion and a new task
+    _complete_step(summary["steps"][0]["id"])
+    _create_task(user_id, "Water the herbs")
+    for name, url in urls.items():
+        changed = _revalidate(url, etags[name])
+        print(f"{name} after change: {changed.status_code}, ETag {changed.headers.get('ETag')}")
+        if changed.status_code != 200 or changed.headers.get("ETag") in (None, etags[name]):
+            print(f"❌ {name}: stale ETag still matched after a change")
+            return False
+
+    print("✅ Unchanged resources revalidate with 304, changes bust the ETag")
+    return True
+
+def test_static_serving():
+    """
+    With the bundled frontend (backend/static) present: traversal attempts
+    are a 400, missing assets/ and api/ paths a real 404, any other unknown
+    path falls back to index.html, and index.html revalidates with a 304.
+    Skipped when the server runs without a static build.
+    """
+    print("\n" + "="*50)
+    print("Testing static frontend serving")
+    print("="*50)
+
+    index = requests.get(f"{BASE_URL}/index.html", timeout=30)
+    if index.status_code == 404:
+        print("⏭️  No backend/static build on this server, skipping")
+        return True
+    if index.status_code != 200 or not index.headers.get("ETag"):
+        print(f"❌ index.html: {index.status_code}, ETag {index.headers.get('ETag')}")
+        return False
+
+    # Percent-encoded so the client sends them as-is instead of normalizing
+    expected = {
+        "/%2e%2e/main.py": 400,
+        "/assets/%2e%2e/%2e%2e/main.py": 400,
+        "/assets%5c..%5cmain.py": 400,
+        "/assets/missing-chunk.js": 404,
+        "/api/v1/no-such-route": 404,
+        "/tasks/42": 200,
+    }
+    for path, status_code in expected.items():
+        response = requests.get(f"{BASE_URL}{path}", timeout=30)
+        print(f"{path}: {response.status_code}")
+        if response.status_code != status_code:
+            print(f"❌ Expected {status_code}")
+            return False
+        if status_code == 200 and response.content != index.content:
+            print("❌ SPA fallback did not serve index.html")
+            return False
+
+    again = requests.get(f"{BASE_URL}/index.html", headers={"If-None-Match": index.headers["ETag"]}, timeout=30)
+    if again.status_code != 304 or again.content:
+        print(f"❌ index.html revalidation answered {again.status_code}")
+        return False
+
+    print("✅ Traversal rejected, missing files 404, SPA routes get index.html")
+    return True
+
+def test_user_rate_limit(max_attempts=15):
+    """
+    Start decompositions for one user back to back until the per-user rate
+    limit (default burst 10) kicks in: the rejection must be a fast 429 with
+    a Retry-After header. The same instruction is reused so repeats are
+    served from the decomposition cache.
+    """
+    print("\n" + "="*50)
+    print("Testing per-user rate limiting of decompositions")
+    print("="*50)
+
+    user_id, _ = _signup_test_user("ratelimit")
+    for attempt in range(1, max_attempts + 1):
+        t0 = time.perf_counter()
+        response = requests.post(
+            f"{BASE_URL}/api/v1/tasks/decompose/stream",
+            params={"user_id": user_id},
+            json={"instruction": "Water the plants on the balcony"},
+            stream=True,
+            timeout=120
+        )
+        elapsed_ms = round((time.perf_counter() - t0) * 1000)
+        response.close()
+        if response.status_code == 429:
+            retry_after = response.headers.get("Retry-After")
+            print(f"Attempt {attempt}: 429 in {elapsed_ms}ms, Retry-After: {retry_after}")
+            if not retry_after or int(retry_after) < 1:
+                print("❌ 429 without a usable Retry-After")
+                return False
+            print("✅ Rate limit enforced")
+            return True
+        if response.status_code != 200:
+            print(f"❌ Unexpected status {response.status_code}")
+            return False
+
+    print(f"❌ No 429 after {max_attempts} decompositions")
+    return False
+
 if __name__ == "__main__":
     print("\n🚀 microWin Backend Test Suite")
     print("="*50)
@@ -117,6 +570,16 @@ if __name__ == "__main__":
     # Run tests
     success = test_decompose_stream()
     test_validation()
+    success = test_concurrent_streams_small_pool() and success
+    success = test_parallel_step_toggles() and success
+    success = test_concurrent_quest_completions() and success
+    success = test_batch_step_update() and success
+    success = test_resume_stream() and success
+    success = test_user_rate_limit() and success
+    success = test_pii_masking() and success
+    success = test_task_pagination() and success
+    success = test_etag_revalidation() and success
+    success = test_static_serving() and success
     
     if success:
         print("\n✨ All tests passed! Backend is working correctly.")